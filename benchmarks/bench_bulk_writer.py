@@ -0,0 +1,56 @@
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sqlalchemy import create_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+from bulk_writer import export_to_sql
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+row_count = 200000
+batch_sizes = [500, 2000, 10000, 50000]
+
+# ==========================================
+# 2. Synthetic Transactions_Final rows
+# ==========================================
+def make_transactions(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Company': rng.choice(['Strike', 'Financial Services'], rows),
+        'Date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 400, rows), unit='D'),
+        'Supplier Account': rng.integers(1000, 9999, rows).astype(str),
+        'Amount': rng.normal(500, 200, rows).round(2),
+        'Supplier Name': rng.choice([f'Supplier {i}' for i in range(500)], rows),
+        'Account Name': rng.choice(['Software', 'Travel', 'Rent', 'Consulting'], rows),
+        'Level 1': rng.choice(['Opex', 'Capex'], rows),
+        'Department': rng.choice(['Finance', 'IT Ops', 'People', 'Partnerships'], rows),
+        'Cost Center': rng.choice([130, 170, 180, 202, 250], rows),
+    })
+
+# ==========================================
+# 3. Benchmark
+# ==========================================
+def main():
+    df = make_transactions(row_count)
+    with tempfile.TemporaryDirectory() as tmp:
+        connection_string = f"sqlite:///{Path(tmp) / 'bench.db'}"
+
+        # Baseline: plain DataFrame.to_sql with default row-by-row binding
+        engine = create_engine(connection_string)
+        start = time.perf_counter()
+        df.to_sql('Transactions_Final', con=engine, if_exists='replace', index=False)
+        elapsed = time.perf_counter() - start
+        print(f"{'to_sql (default)':<22} {row_count / elapsed:12,.0f} rows/sec")
+        engine.dispose()
+
+        for batch_size in batch_sizes:
+            rate = export_to_sql(df, 'Transactions_Final', connection_string, batch_size=batch_size)
+            print(f"{f'bulk batch={batch_size}':<22} {rate:12,.0f} rows/sec")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+import Transactions_Final
+import data_lake
+from bulk_writer import export_to_sql
+from database import get_engine
+from change_detection import row_fingerprints
+from synthetic_data import first_month, account_names, departments, cost_centers
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# Rows across Transactions_AX and Transactions_Sage (split evenly), spread over the months
+default_rows = 2000000
+default_months = 24
+
+# Share of rows changed between the two loads (60% revalued, 20% deleted, 20% new), all in the latest months
+default_change_rate = 0.005
+default_changed_months = 1
+
+# ==========================================
+# 2. Synthetic Source Tables
+# ==========================================
+def make_source(rows, months, columns, renames, seed):
+    """One source table in its own column names (renames maps them from the final table's)."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Company': rng.choice(['Strike', 'Financial Services'], rows),
+        'Date': first_month + pd.to_timedelta(rng.integers(0, months * 30, rows), unit='D'),
+        'Supplier Account': rng.integers(1000, 9999, rows).astype(str),
+        'Amount': rng.normal(500, 200, rows).round(2),
+        'Supplier Name': rng.choice([f'Supplier {i}' for i in range(500)], rows),
+        'Account Name': rng.choice(account_names, rows),
+        'Level 1': rng.choice(['Opex', 'Capex'], rows),
+        'Level 2': rng.choice([f'L2 {i}' for i in range(8)], rows),
+        'Level 3': rng.choice([f'L3 {i}' for i in range(30)], rows),
+        'Level 4': rng.choice([f'L4 {i}' for i in range(120)], rows),
+        'Main Account': rng.integers(60000, 60100, rows).astype(float),
+        'Department': rng.choice(departments, rows),
+        'Cost Center': rng.choice(cost_centers, rows).astype(float),
+        'Posting type': rng.choice(['Ledger journal', 'Vendor invoice'], rows),
+    })
+    return df.rename(columns={final: source for source, final in renames.items()})[columns]
+
+def change_rows(df, change_rate, changed_months, seed):
+    """Revalue, delete and add a small share of the rows dated in the latest months."""
+    rng = np.random.default_rng(seed)
+    amount = next(column for column in df.columns if column in ('Amount in reporting currency', 'Total'))
+    recent = np.flatnonzero(df['Date'] >= df['Date'].max() - pd.DateOffset(months=changed_months))
+    changed = rng.choice(recent, min(int(len(df) * change_rate), len(recent)), replace=False)
+    revalued, deleted, copied = np.array_split(changed, [int(len(changed) * 0.6), int(len(changed) * 0.8)])
+
+    df = df.copy()
+    df.loc[revalued, amount] = (df.loc[revalued, amount] + 10).round(2)
+    added = df.loc[copied].assign(**{amount: rng.normal(500, 200, len(copied)).round(2)})
+    return pd.concat([df.drop(index=deleted), added], ignore_index=True)
+
+# ==========================================
+# 3. Benchmark
+# ==========================================
+def build(connection_string, mode):
+    """Run Transactions_Final in one build mode; returns the wall time."""
+    Transactions_Final.connection_string = connection_string
+    Transactions_Final.build_mode = mode
+    start = time.perf_counter()
+    Transactions_Final.main()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the incremental Transactions_Final build with a full rebuild.")
+    parser.add_argument('--rows', type=int, default=default_rows)
+    parser.add_argument('--months', type=int, default=default_months)
+    parser.add_argument('--change-rate', type=float, default=default_change_rate)
+    parser.add_argument('--changed-months', type=int, default=default_changed_months)
+    args = parser.parse_args()
+
+    sources = [
+        ('Transactions_AX', Transactions_Final.transactions_ax_columns, Transactions_Final.transactions_ax_renames),
+        ('Transactions_Sage', Transactions_Final.transactions_sage_columns, Transactions_Final.transactions_sage_renames),
+    ]
+    frames = {name: make_source(args.rows // 2, args.months, columns, renames, seed)
+              for seed, (name, columns, renames) in enumerate(sources)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_lake.lake_directory = Path(tmp) / 'lake'
+        first_load = Path(tmp) / 'first_load.db'
+        connection_string = f"sqlite:///{first_load}"
+        for name, df in frames.items():
+            export_to_sql(df, name, connection_string)
+        initial = build(connection_string, 'incremental')
+        get_engine(connection_string).dispose()
+
+        # Second load: the same sources with a small share of the recent rows changed
+        changed = {name: change_rows(df, args.change_rate, args.changed_months, seed + 100)
+                   for seed, (name, df) in enumerate(frames.items())}
+        results = {}
+        for mode in ('pushdown', 'incremental'):
+            database = Path(tmp) / f'{mode}.db'
+            shutil.copy(first_load, database)
+            connection_string = f"sqlite:///{database}"
+            for name, df in changed.items():
+                export_to_sql(df, name, connection_string)
+            results[mode] = build(connection_string, mode)
+            get_engine(connection_string).dispose()
+
+    # The fingerprint step on its own, over the final-table shape
+    final = pd.concat([
+        Transactions_Final.finalize_frame(df, renames, 'now') for (_, _, renames), df in zip(sources, changed.values())
+    ], ignore_index=True)
+    start = time.perf_counter()
+    row_fingerprints(final, Transactions_Final.row_key_columns, Transactions_Final.business_columns)
+    fingerprint_seconds = time.perf_counter() - start
+
+    print()
+    print(f"{len(final):,} rows, {args.change_rate:.2%} changed in the latest {args.changed_months} month(s)")
+    print(f"{'first build (full)':<28} {initial:8.2f}s")
+    print(f"{'full rebuild (pushdown)':<28} {results['pushdown']:8.2f}s")
+    print(f"{'incremental':<28} {results['incremental']:8.2f}s   ({results['pushdown'] / results['incremental']:.1f}x)")
+    print(f"{'fingerprints only':<28} {fingerprint_seconds:8.2f}s   ({len(final) / fingerprint_seconds:,.0f} rows/sec)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+import data_lake
+import Transactions_Final
+from bulk_writer import export_to_sql
+from database import get_engine
+from schema import transactions_ax_schema, apply_schema
+from bench_change_detection import make_source
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+default_rows = 1000000
+default_months = 24
+repeats = 3
+
+# ==========================================
+# 2. Benchmark
+# ==========================================
+def best_time(function):
+    """Best of a few runs, with the result of the last."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare reading Transactions_AX from SQL with reading its lake copy.")
+    parser.add_argument('--rows', type=int, default=default_rows)
+    parser.add_argument('--months', type=int, default=default_months)
+    args = parser.parse_args()
+
+    table_name = 'Transactions_AX'
+    columns = Transactions_Final.transactions_ax_columns
+    df = apply_schema(make_source(args.rows, args.months, columns, Transactions_Final.transactions_ax_renames, 0),
+                      transactions_ax_schema)
+    last_month = df['Date'].max().to_period('M').start_time
+
+    with tempfile.TemporaryDirectory() as tmp:
+        connection_string = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        export_to_sql(df, table_name, connection_string)
+        data_lake.write_partitions(df, table_name, directory=tmp)
+
+        results = {
+            'SQL, every month': best_time(
+                lambda: Transactions_Final.read_sql_table(connection_string, table_name, columns)),
+            'lake, every month': best_time(
+                lambda: data_lake.read_table(table_name, columns, directory=tmp)),
+            'lake, latest month': best_time(
+                lambda: data_lake.read_table(table_name, columns, [last_month], directory=tmp)),
+            'lake, 3 columns': best_time(
+                lambda: data_lake.read_table(table_name, ['Date', 'Amount in reporting currency', 'Department'],
+                                             directory=tmp)),
+        }
+        get_engine(connection_string).dispose()
+        lake_mb = data_lake.table_summary(table_name, tmp)[2] / 1024 ** 2
+
+    print(f"\n{len(df):,} rows over {args.months} months ({lake_mb:.0f} MB of Parquet)")
+    print(f"{'read':<22}{'seconds':>10}{'rows':>12}{'rows/sec':>14}")
+    for name, (seconds, result) in results.items():
+        print(f"{name:<22}{seconds:>10.3f}{len(result):>12,}{len(result) / seconds:>14,.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import sys
+import time
+import argparse
+import tempfile
+import sqlalchemy as sa
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+import database
+import Transactions_Final
+from bulk_writer import export_to_sql
+from database import get_engine, run_concurrently, reset_metrics, report_metrics
+from bench_change_detection import make_source
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+default_rows = 300000
+default_months = 24
+repeats = 3
+
+# ==========================================
+# 2. Benchmark
+# ==========================================
+def read_sources(connection_string, concurrent):
+    """Read Transactions_AX and Transactions_Sage as Transactions_Final does, one after the other or in parallel."""
+    reads = [
+        lambda: Transactions_Final.read_sql_table(connection_string, 'Transactions_AX',
+                                                  Transactions_Final.transactions_ax_columns),
+        lambda: Transactions_Final.read_sql_table(connection_string, 'Transactions_Sage',
+                                                  Transactions_Final.transactions_sage_columns),
+    ]
+    if concurrent:
+        return run_concurrently(reads)
+    return [read() for read in reads]
+
+def add_round_trip(engine, seconds):
+    """Delay every statement, standing in for the network round trip to a remote server."""
+    @sa.event.listens_for(engine, 'before_cursor_execute')
+    def delay(*args):
+        time.sleep(seconds)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare reading the AX and Sage tables one after the other and in parallel.")
+    parser.add_argument('--rows', type=int, default=default_rows, help="rows per source table")
+    parser.add_argument('--months', type=int, default=default_months)
+    parser.add_argument('--round-trip-ms', type=float, default=0, help="delay added to every statement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        connection_string = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        for seed, (table_name, columns, renames) in enumerate([
+            ('Transactions_AX', Transactions_Final.transactions_ax_columns, Transactions_Final.transactions_ax_renames),
+            ('Transactions_Sage', Transactions_Final.transactions_sage_columns, Transactions_Final.transactions_sage_renames),
+        ]):
+            export_to_sql(make_source(args.rows, args.months, columns, renames, seed), table_name, connection_string)
+        add_round_trip(get_engine(connection_string), args.round_trip_ms / 1000)
+
+        results = {}
+        for concurrent in (False, True):
+            reset_metrics()
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                frames = read_sources(connection_string, concurrent)
+                timings.append(time.perf_counter() - start)
+            results['parallel' if concurrent else 'sequential'] = (min(timings), sum(len(df) for df in frames))
+            print(f"\nDatabase latency, {'parallel' if concurrent else 'sequential'} reads:")
+            report_metrics()
+        database.dispose_engines()
+
+    print(f"\n{args.rows:,} rows per table, pool size {database.pool_size}, {args.round_trip_ms:g} ms per statement")
+    print(f"{'reads':<14}{'seconds':>10}{'rows':>12}{'rows/sec':>14}")
+    for name, (seconds, rows) in results.items():
+        print(f"{name:<14}{seconds:>10.3f}{rows:>12,}{rows / seconds:>14,.0f}")
+
+if __name__ == '__main__':
+    main()
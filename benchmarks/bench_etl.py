@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import shutil
+import time
+import argparse
+import platform
+import resource
+import importlib
+import subprocess
+import tempfile
+import traceback
+import sqlalchemy as sa
+from pathlib import Path
+from datetime import datetime
+from multiprocessing import get_context
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+from pipeline import stages, topological_order
+from synthetic_data import default_scale, generate, read_manifest, add_scale_arguments
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+repository_root = Path(__file__).resolve().parents[1]
+default_results_directory = repository_root / 'benchmarks' / 'results'
+
+# ==========================================
+# 2. Stage settings
+# ==========================================
+def stage_settings(manifest, connection_string):
+    """Module settings that point each script at the synthetic share and the SQLite target."""
+    directories = {name: Path(path) for name, path in manifest['directories'].items()}
+    common = {'connection_string': connection_string}
+    # Full, uncached loads so every run measures the same work
+    loader = {'load_mode': 'replace', 'use_workbook_cache': False}
+    return {
+        'Transactions_AX': {**common, **loader,
+                            'raw_data_directory': str(directories['AX']),
+                            'supplier_mapping_directory': str(directories['Mapping']),
+                            'transactions_files': manifest['ax_files'],
+                            'transactions_file_pattern': None},
+        'Transactions_Sage': {**common, **loader,
+                              'root_directory': str(directories['SAGE']),
+                              'mapping_file_path': directories['Mapping'] / 'Mapping_Sage.xlsx',
+                              'transactions_file_names': manifest['sage_files'],
+                              'transactions_file_pattern': None},
+        'Forecasts': {**common,
+                      'forecast_workbooks': [
+                          {'department': department, 'directory': str(directories['Forecast']),
+                           'file_name': f'{department} - Forecast File.xlsx',
+                           'sheet_name': f'{department} Spend Consolidated'}
+                          for department in ('Marketing', 'Tech')
+                      ]},
+        'Transactions_Final': common,
+        # The synthetic forecasts carry a Department column of the same names as the actuals
+        'Actual_vs_Forecast': {**common, 'forecast_key_columns': {
+            'Level 1': 'Level 1', 'Level 2': 'Level 2', 'Level 3': 'Level 3', 'Level 4': 'Level 4',
+            'Department': 'Department (workbook)', 'Cost Center': 'Cost Center'}},
+    }
+
+# ==========================================
+# 3. Measurement
+# ==========================================
+def peak_rss_mb():
+    """Peak resident memory of this process in MB."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def measure_stage(name, settings, queue):
+    """Configure and run one stage in a fresh process; report wall time and peak memory."""
+    try:
+        module = importlib.import_module(name)
+        for setting, value in settings.items():
+            setattr(module, setting, value)
+        start = time.perf_counter()
+        module.main()
+        elapsed = time.perf_counter() - start
+        queue.put({
+            'seconds': round(elapsed, 3),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            # Largest worker process of the stage's parsing pool (0 when it parsed in-process)
+            'peak_worker_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        })
+    except Exception:
+        queue.put({'error': traceback.format_exc()})
+
+def run_isolated(name, settings):
+    context = get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=measure_stage, args=(name, settings, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def table_rows(engine, tables):
+    with engine.connect() as connection:
+        inspector = sa.inspect(connection)
+        return sum(connection.execute(sa.select(sa.func.count()).select_from(sa.table(table))).scalar()
+                   for table in tables if inspector.has_table(table))
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repository_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+# ==========================================
+# 4. Benchmark
+# ==========================================
+def run_benchmark(data_directory, scale, seed=0):
+    """Generate (or reuse) the synthetic share, run every stage against SQLite and return the results."""
+    manifest = read_manifest(data_directory)
+    if manifest is None or manifest['scale'] != scale or manifest['seed'] != seed:
+        start = time.perf_counter()
+        manifest = generate(data_directory, seed, **scale)
+        print(f"Generated synthetic data in {time.perf_counter() - start:.1f}s")
+
+    database_path = Path(data_directory) / 'bench.db'
+    database_path.unlink(missing_ok=True)
+    # A fresh Parquet lake next to the database; the stage processes inherit its location
+    lake_path = Path(data_directory) / 'lake'
+    shutil.rmtree(lake_path, ignore_errors=True)
+    os.environ['FINANCE_ETL_LAKE'] = str(lake_path)
+    connection_string = f"sqlite:///{database_path}"
+    engine = sa.create_engine(connection_string)
+    settings = stage_settings(manifest, connection_string)
+
+    results = {}
+    for stage in topological_order(stages):
+        print(f"Running {stage.name} ...")
+        result = run_isolated(stage.name, settings[stage.name])
+        if 'error' in result:
+            print(result['error'])
+        else:
+            result['rows_written'] = table_rows(engine, stage.outputs)
+            result['rows_per_second'] = round(result['rows_written'] / result['seconds']) if result['seconds'] else 0
+        results[stage.name] = result
+    engine.dispose()
+
+    return {
+        'commit': current_commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'scale': scale,
+        'stages': results,
+        'total_seconds': round(sum(result.get('seconds', 0) for result in results.values()), 3),
+    }
+
+def print_results(results, baseline=None):
+    header = f"{'stage':<22}{'seconds':>10}{'rows':>10}{'rows/sec':>12}{'peak MB':>10}{'worker MB':>11}"
+    print(f"\n{header}{'  vs baseline' if baseline else ''}")
+    for name, result in results['stages'].items():
+        if 'error' in result:
+            print(f"{name:<22}{'failed':>10}")
+            continue
+        line = (f"{name:<22}{result['seconds']:>10.2f}{result['rows_written']:>10}{result['rows_per_second']:>12,}"
+                f"{result['peak_rss_mb']:>10.0f}{result['peak_worker_rss_mb']:>11.0f}")
+        previous = (baseline or {}).get('stages', {}).get(name, {})
+        if previous.get('seconds'):
+            line += f"  {result['seconds'] / previous['seconds']:.2f}x time ({baseline['commit']})"
+        print(line)
+    print(f"{'total':<22}{results['total_seconds']:>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every ETL stage on synthetic data against SQLite.")
+    parser.add_argument('--data-directory', type=Path,
+                        help="where the synthetic share is written (reused when its scale matches); default a temp dir")
+    parser.add_argument('--output', type=Path, help="results JSON (default benchmarks/results/etl-<commit>.json)")
+    parser.add_argument('--baseline', type=Path, help="earlier results JSON to compare against")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+    scale = {name: getattr(args, name) for name in default_scale}
+
+    if args.data_directory:
+        args.data_directory.mkdir(parents=True, exist_ok=True)
+        results = run_benchmark(args.data_directory, scale, args.seed)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = run_benchmark(tmp, scale, args.seed)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output or default_results_directory / f"etl-{results['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=1)
+    print(f"Results written to {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+import sys
+import time
+import resource
+import tempfile
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from multiprocessing import get_context
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+from excel_ingest import read_ax_transactions
+from synthetic_data import write_ax_workbook
+from bench_parallel_ingest import transactions_columns
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+row_count = 100000
+unused_column_count = 40
+
+# ==========================================
+# 2. Readers under test
+# ==========================================
+def previous_reader(file_path, columns):
+    """The reader this benchmark replaces: parse the whole sheet, then subset and filter."""
+    df = pd.read_excel(file_path, sheet_name='Sheet1')
+    df = df[[c for c in columns if c in df.columns]]
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%d/%m/%Y')
+    return df[(df['Supplier Required'] == True) & (df['Ledger Code'] > 5)].reset_index(drop=True)
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB."""
+    # VmHWM starts fresh in each spawned process; ru_maxrss (in KB on Linux) can carry over the parent's peak
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def measure(reader, file_path, queue):
+    """Run one reader in a fresh process and report wall time, peak RSS and the result."""
+    start = time.perf_counter()
+    df = reader(file_path, transactions_columns)
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, peak_rss_mb(), df))
+
+def run_isolated(reader, file_path):
+    context = get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=measure, args=(reader, file_path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+# ==========================================
+# 3. Benchmark
+# ==========================================
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        # A wide export: the columns the pipeline needs plus many it never reads
+        path = Path(tmp) / 'Wide - AX.xlsx'
+        write_ax_workbook(path, row_count, seed=0)
+        df = pd.read_excel(path)
+        rng = np.random.default_rng(1)
+        for i in range(unused_column_count):
+            df[f'Unused {i}'] = rng.normal(size=row_count).round(2)
+        df.to_excel(path, sheet_name='Sheet1', index=False)
+        print(f"Workbook: {row_count} rows x {len(df.columns)} columns ({len(transactions_columns)} used)")
+
+        previous_seconds, previous_rss, previous_df = run_isolated(previous_reader, path)
+        streaming_seconds, streaming_rss, streaming_df = run_isolated(read_ax_transactions, path)
+        pd.testing.assert_frame_equal(streaming_df, previous_df)
+
+        print(f"{'reader':<24}{'seconds':>10}{'peak RSS (MB)':>16}")
+        print(f"{'pd.read_excel + subset':<24}{previous_seconds:>10.2f}{previous_rss:>16.0f}")
+        print(f"{'streaming, pruned':<24}{streaming_seconds:>10.2f}{streaming_rss:>16.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+from file_index import FileIndex
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+directory_count = 200
+files_per_directory = 25
+months = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+
+# ==========================================
+# 2. Synthetic raw-data share
+# ==========================================
+def build_tree(root):
+    """Create a nested tree of filler files with one AX export per month hidden inside it."""
+    for i in range(directory_count):
+        directory = root / f'Team {i % 10}' / f'Folder {i}'
+        directory.mkdir(parents=True, exist_ok=True)
+        for j in range(files_per_directory):
+            (directory / f'Report {i}-{j}.xlsx').touch()
+    for i, month in enumerate(months):
+        (root / f'Team {i % 10}' / f'Folder {i}' / f'{month} 2024 - AX.xlsx').touch()
+    return [f'{month} 2024 - AX.xlsx' for month in months]
+
+# ==========================================
+# 3. Benchmark
+# ==========================================
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / 'Raw_Data'
+        names = build_tree(root)
+        print(f"Synthetic tree: {directory_count * files_per_directory + len(names)} files")
+
+        start = time.perf_counter()
+        rglob_found = [path for name in names for path in root.rglob(name)]
+        print(f"rglob per name ({len(names)} walks):   {time.perf_counter() - start:8.3f}s")
+
+        index_path = Path(tmp) / 'index.json'
+        start = time.perf_counter()
+        index = FileIndex(root, index_path)
+        index_found = [path for name in names for path in index.find(name)]
+        print(f"index, cold (1 walk):          {time.perf_counter() - start:8.3f}s")
+        assert sorted(index_found) == sorted(rglob_found)
+
+        start = time.perf_counter()
+        index = FileIndex(root, index_path)
+        index.find_regex(r'[A-Za-z]+ \d{4} - AX\.xlsx')
+        print(f"index, persisted (stat only):  {time.perf_counter() - start:8.3f}s  ({index.rescanned} directories re-listed)")
+
+if __name__ == '__main__':
+    main()
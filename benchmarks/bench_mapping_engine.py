@@ -0,0 +1,81 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+from mapping_engine import Lookup, MappingEngine
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+row_count = 200000
+rule_counts = [12, 500, 2000, 5000]
+company_account_count = 3000
+
+# ==========================================
+# 2. Synthetic Sage rows and rules
+# ==========================================
+def make_inputs(rows, rules, seed=0):
+    """Transactions, a Company/Account mapping with NULL departments, and rules Account overrides."""
+    rng = np.random.default_rng(seed)
+    accounts = [f'SUPPLIER{i}' for i in range(rules * 2)]
+    transactions = pd.DataFrame({
+        'Company/Account': rng.choice([f'C{i}' for i in range(company_account_count)], rows),
+        'Account': rng.choice(accounts, rows),
+        'Total': rng.normal(50, 5, rows).round(2),
+    })
+    mapping = pd.DataFrame({
+        'Company/Account': [f'C{i}' for i in range(company_account_count)],
+        'Name': [f'Name {i}' for i in range(company_account_count)],
+        'Cost Center': rng.choice([100.0, 120.0, np.nan], company_account_count),
+        'Department': rng.choice(['HR', 'Ops', None], company_account_count),
+    })
+    overrides = {
+        account: {'Cost Center': int(rng.choice([130, 170, 180, 202, 250])), 'Department': f'Dept {i % 7}'}
+        for i, account in enumerate(accounts[:rules])
+    }
+    return transactions, mapping, overrides
+
+# ==========================================
+# 3. Implementations under test
+# ==========================================
+def previous_mapping(transactions, mapping, overrides):
+    """The code this benchmark replaces: merge, then one boolean mask and two .loc writes per override."""
+    merged = pd.merge(transactions, mapping, on='Company/Account', how='left')
+    for account, update_values in overrides.items():
+        condition = (merged['Account'] == account) & (merged['Department'].isnull())
+        merged.loc[condition, 'Cost Center'] = update_values['Cost Center']
+        merged.loc[condition, 'Department'] = update_values['Department']
+    return merged
+
+def engine_mapping(transactions, mapping, overrides):
+    engine = MappingEngine([
+        Lookup('Mapping_Sage', mapping, key='Company/Account'),
+        Lookup('Account overrides', overrides, key='Account', fill_missing='Department'),
+    ])
+    return engine.apply(transactions, report=False)
+
+# ==========================================
+# 4. Benchmark
+# ==========================================
+def main():
+    print(f"{row_count} rows")
+    print(f"{'rules':>8}{'loop (s)':>12}{'engine (s)':>12}{'speedup':>10}")
+    for rules in rule_counts:
+        transactions, mapping, overrides = make_inputs(row_count, rules)
+
+        start = time.perf_counter()
+        previous = previous_mapping(transactions, mapping, overrides)
+        previous_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        mapped = engine_mapping(transactions, mapping, overrides)
+        engine_seconds = time.perf_counter() - start
+
+        pd.testing.assert_frame_equal(mapped, previous, check_dtype=False)
+        print(f"{rules:>8}{previous_seconds:>12.2f}{engine_seconds:>12.3f}{previous_seconds / engine_seconds:>9.0f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import sys
+import time
+import tempfile
+import pandas as pd
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+from excel_ingest import read_ax_transactions, load_in_parallel
+from synthetic_data import write_ax_workbook
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+file_count = 13
+rows_per_file = 20000
+worker_counts = [1, 2, 4, 8]
+
+transactions_columns = [
+    'Journal number', 'Voucher', 'Date', 'Year closed', 'Ledger account',
+    'Account name', 'Description', 'Currency', 'Amount in transaction currency',
+    'Amount', 'Amount in reporting currency', 'Posting type', 'Posting layer',
+    'Supplier Name AX', 'Supplier Account AX', 'MainAccount', 'Supplier Required', 'Ledger Code'
+]
+
+# ==========================================
+# 2. Benchmark
+# ==========================================
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(file_count):
+            path = Path(tmp) / f'Month {i + 1} - AX.xlsx'
+            write_ax_workbook(path, rows_per_file, seed=i)
+            paths.append(path)
+        print(f"Generated {file_count} workbooks x {rows_per_file} rows in {tmp}")
+
+        baseline = None
+        baseline_seconds = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            frames = load_in_parallel(read_ax_transactions, paths, max_workers=workers, columns=transactions_columns)
+            result = pd.concat(frames, ignore_index=True)
+            elapsed = time.perf_counter() - start
+
+            if baseline is None:
+                baseline, baseline_seconds = result, elapsed
+            else:
+                # Output must be identical to the serial path
+                pd.testing.assert_frame_equal(result, baseline)
+
+            print(f"workers={workers:<3} rows={len(result):<8} {elapsed:8.2f}s  speedup x{baseline_seconds / elapsed:.2f}")
+
+if __name__ == '__main__':
+    main()
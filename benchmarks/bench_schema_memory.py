@@ -0,0 +1,58 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+from schema import transactions_ax_schema, apply_schema
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+row_count = 1_000_000
+
+# ==========================================
+# 2. Synthetic Transactions_AX rows, as the pipeline produced them before the declared schema
+# ==========================================
+def make_previous_ax(rows, seed=0):
+    """Dates as dd/mm/yyyy strings, hierarchy and cost centers as Python-object strings."""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 730, rows), unit='D')
+    df = pd.DataFrame({
+        'Date': dates.strftime('%d/%m/%Y'),
+        'Account name': rng.choice(['Software', 'Travel', 'Rent', 'Consulting', 'Utilities'], rows),
+        'Currency': rng.choice(['GBP', 'EUR', 'USD'], rows),
+        'Amount in reporting currency': rng.normal(500, 200, rows),
+        'Posting type': rng.choice(['Ledger journal', 'Vendor balance', 'Purchase expenditure'], rows),
+        'Supplier Name AX': rng.choice([f'Supplier {i}' for i in range(2000)], rows),
+        'Company': rng.choice(['Strike', 'Financial Services'], rows),
+        'Level 1': rng.choice(['Opex', 'Capex'], rows),
+        'Level 2': rng.choice([f'L2 {i}' for i in range(8)], rows),
+        'Level 3': rng.choice([f'L3 {i}' for i in range(30)], rows),
+        'Level 4': rng.choice([f'L4 {i}' for i in range(120)], rows),
+        'Department': rng.choice(['Finance', 'IT Ops', 'People', 'Partnerships', 'Marketing'], rows),
+        'Cost Center': rng.choice(['130', '170', '180', '202', '250', None], rows),
+    })
+    return df.astype({name: object for name in df.columns if name != 'Amount in reporting currency'})
+
+# ==========================================
+# 3. Report
+# ==========================================
+def main():
+    before = make_previous_ax(row_count)
+    before_usage = before.memory_usage(deep=True, index=False)
+
+    start = time.perf_counter()
+    after = apply_schema(before.copy(), transactions_ax_schema)
+    elapsed = time.perf_counter() - start
+    after_usage = after.memory_usage(deep=True, index=False)
+
+    print(f"{row_count:,} synthetic AX rows; schema applied in {elapsed:.2f}s")
+    print(f"{'column':<32}{'before':>12}{'after':>12}  dtype")
+    for name in before.columns:
+        print(f"{name:<32}{before_usage[name] / 1024 ** 2:>10.1f}MB{after_usage[name] / 1024 ** 2:>10.1f}MB  {after[name].dtype}")
+    print(f"{'total':<32}{before_usage.sum() / 1024 ** 2:>10.1f}MB{after_usage.sum() / 1024 ** 2:>10.1f}MB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import argparse
+import tempfile
+import pandas as pd
+import sqlalchemy as sa
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+from bench_etl import stage_settings, run_isolated
+from synthetic_data import default_scale, generate, add_scale_arguments
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# Larger exports than the ETL benchmark, so the in-memory peak is dominated by the data
+default_rows = 50000
+
+stage_names = ['Transactions_AX', 'Transactions_Sage']
+processing_modes = ['in_memory', 'streaming']
+
+# ==========================================
+# 2. Benchmark
+# ==========================================
+def read_table(connection_string, table_name):
+    """A table's rows in a stable order, values and dtypes as read back, for comparing the two modes."""
+    engine = sa.create_engine(connection_string)
+    try:
+        df = pd.read_sql_table(table_name, engine)
+    finally:
+        engine.dispose()
+    # Sort on the text of each value, so a column holding both numbers and strings still sorts
+    return df.sort_values(list(df.columns), key=lambda column: column.astype(str), ignore_index=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare in-memory and streaming loads of the AX and Sage exports.")
+    parser.add_argument('--batch-size', type=int, default=50000, help="rows per streamed batch")
+    add_scale_arguments(parser)
+    parser.set_defaults(rows=default_rows)
+    args = parser.parse_args()
+    scale = {name: getattr(args, name) for name in default_scale}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = generate(Path(tmp) / 'data', args.seed, **scale)
+        os.environ['FINANCE_ETL_LAKE'] = str(Path(tmp) / 'lake')
+        results = {}
+        for name in stage_names:
+            tables = {}
+            for mode in processing_modes:
+                connection_string = f"sqlite:///{Path(tmp) / f'{name}-{mode}.db'}"
+                settings = {**stage_settings(manifest, connection_string)[name],
+                            'processing_mode': mode, 'stream_batch_size': args.batch_size}
+                print(f"Running {name} ({mode}) ...")
+                results[name, mode] = run_isolated(name, settings)
+                if 'error' in results[name, mode]:
+                    print(results[name, mode]['error'])
+                    continue
+                tables[mode] = read_table(connection_string, name)
+                results[name, mode]['rows_written'] = len(tables[mode])
+            if len(tables) == len(processing_modes):
+                # DataFrame.equals also requires every column to have the same dtype in both tables
+                results[name, 'streaming']['identical'] = tables['in_memory'].equals(tables['streaming'])
+
+    print(f"\n{scale['months']} monthly exports of {scale['rows']:,} rows, streamed in batches of {args.batch_size:,}")
+    print(f"{'stage':<20}{'mode':<12}{'seconds':>10}{'rows':>10}{'peak MB':>10}{'worker MB':>11}")
+    for (name, mode), result in results.items():
+        if 'error' in result:
+            print(f"{name:<20}{mode:<12}{'failed':>10}")
+            continue
+        line = (f"{name:<20}{mode:<12}{result['seconds']:>10.2f}{result['rows_written']:>10}"
+                f"{result['peak_rss_mb']:>10.0f}{result['peak_worker_rss_mb']:>11.0f}")
+        if 'identical' in result:
+            line += "  same table" if result['identical'] else "  TABLES DIFFER"
+        print(line)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import sys
+import time
+import tempfile
+import pandas as pd
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+from excel_ingest import read_ax_transactions, load_in_parallel
+from workbook_cache import WorkbookCache
+from synthetic_data import write_ax_workbook
+from bench_parallel_ingest import transactions_columns
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+file_count = 14
+rows_per_file = 20000
+
+# ==========================================
+# 2. Benchmark
+# ==========================================
+def timed_load(paths, cache):
+    start = time.perf_counter()
+    frames = load_in_parallel(read_ax_transactions, paths, max_workers=1, cache=cache, columns=transactions_columns)
+    return pd.concat(frames, ignore_index=True), time.perf_counter() - start
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(file_count):
+            path = Path(tmp) / f'Month {i + 1} - AX.xlsx'
+            write_ax_workbook(path, rows_per_file, seed=i)
+            paths.append(path)
+
+        cache = WorkbookCache(Path(tmp) / 'cache')
+        cold, cold_seconds = timed_load(paths, cache)
+        print(f"cold run (all misses):        {cold_seconds:8.2f}s")
+
+        warm, warm_seconds = timed_load(paths, cache)
+        pd.testing.assert_frame_equal(warm, cold)
+        print(f"warm run (all hits):          {warm_seconds:8.2f}s")
+
+        # Simulate month-end: only the latest export has changed
+        write_ax_workbook(paths[-1], rows_per_file, seed=file_count)
+        _, month_end_seconds = timed_load(paths, cache)
+        print(f"month-end run (1 file new):   {month_end_seconds:8.2f}s")
+        print(f"single-file parse:            {cold_seconds / file_count:8.2f}s")
+        cache.report()
+
+if __name__ == '__main__':
+    main()
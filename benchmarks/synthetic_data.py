@@ -0,0 +1,214 @@
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# Default scale: 12 monthly exports per system, 5,000 rows each
+default_scale = {
+    'months': 12,
+    'rows': 5000,
+    'suppliers': 200,
+    'mapping_size': 100,
+    'forecast_lines': 200,
+}
+
+first_month = pd.Timestamp('2024-01-01')
+manifest_name = 'synthetic_manifest.json'
+
+# Accounts the Sage override rules resolve (config/sage_account_overrides.csv)
+override_accounts = ['ADP', 'BIRKETTS', 'ENJOY', 'GIRAFFE', 'GOTO', 'HOUSE',
+                     'MAB', 'OPTAMOR', 'PPL', 'PRATT', 'RIGHT', 'ZOHO']
+
+account_names = ['Software', 'Travel', 'Rent', 'Consulting', 'Utilities', 'Marketing', 'Payroll']
+departments = ['Finance', 'IT Ops', 'People', 'Partnerships', 'Marketing', 'Head Office (utilities & other)']
+cost_centers = [130, 170, 180, 202, 250]
+
+# ==========================================
+# 2. AX exports (Sheet1, one header row)
+# ==========================================
+def write_ax_workbook(path, rows, seed, suppliers=200, mapping_size=100, month=first_month):
+    """Write one synthetic AX export with the Sheet1 layout the pipeline expects."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Journal number': rng.integers(1, 10**6, rows),
+        'Voucher': [f'V{i:07d}' for i in range(rows)],
+        'Date': month + pd.to_timedelta(rng.integers(0, 28, rows), unit='D'),
+        'Year closed': 'No',
+        'Ledger account': rng.integers(10000, 99999, rows).astype(str),
+        'Account name': rng.choice(account_names[:4], rows),
+        'Description': 'Synthetic posting',
+        'Currency': 'GBP',
+        'Amount in transaction currency': rng.normal(500, 200, rows).round(2),
+        'Amount': rng.normal(500, 200, rows).round(2),
+        'Amount in reporting currency': rng.normal(500, 200, rows).round(2),
+        'Posting type': 'Ledger journal',
+        'Posting layer': 'Current',
+        'Supplier Name AX': rng.choice([f'Supplier {i}' for i in range(suppliers)], rows),
+        'Supplier Account AX': rng.integers(1000, 9999, rows).astype(str),
+        'MainAccount': rng.integers(60000, 60000 + mapping_size, rows),
+        'Supplier Required': rng.random(rows) < 0.7,
+        'Ledger Code': rng.integers(0, 12, rows),
+    })
+    df.to_excel(path, sheet_name='Sheet1', index=False)
+
+def write_ax_mappings(directory, suppliers, mapping_size, seed):
+    """Mapping_Consolidated.xlsx (by MainAccount) and Mapping_AX.xlsx (by supplier, ~10% unmapped)."""
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        'MainAccount': np.arange(60000, 60000 + mapping_size),
+        'Company': rng.choice(['Strike', 'Financial Services'], mapping_size),
+        'FS type': rng.choice(['P&L', 'Balance Sheet'], mapping_size),
+        'Level 1': rng.choice(['Opex', 'Capex'], mapping_size),
+        'Level 2': rng.choice([f'L2 {i}' for i in range(8)], mapping_size),
+        'Level 3': rng.choice([f'L3 {i}' for i in range(30)], mapping_size),
+        'Level 4': [f'L4 {i}' for i in range(mapping_size)],
+    }).to_excel(Path(directory) / 'Mapping_Consolidated.xlsx', sheet_name='Sheet1', index=False)
+
+    mapped = int(suppliers * 0.9)
+    pd.DataFrame({
+        'Supplier Name AX': [f'Supplier {i}' for i in range(mapped)],
+        'Department': rng.choice(departments, mapped),
+        'Cost Center': rng.choice(cost_centers, mapped).astype(float),
+    }).to_excel(Path(directory) / 'Mapping_AX.xlsx', sheet_name='Sheet1', index=False)
+
+# ==========================================
+# 3. Sage Nominal Activity exports (8 preamble rows, header on row 9)
+# ==========================================
+def sage_accounts(suppliers):
+    return override_accounts + [f'SUPP{i:04d}' for i in range(max(suppliers - len(override_accounts), 0))]
+
+def write_sage_workbook(path, rows, seed, suppliers=200, mapping_size=100, month=first_month):
+    """Write one synthetic Nominal Activity export, including the blank-N/C: subtotal lines."""
+    rng = np.random.default_rng(seed)
+    accounts = np.array(sage_accounts(suppliers), dtype=object)
+    account = rng.choice(accounts, rows)
+    # Exports pad some account codes with a trailing space; the script strips them
+    account = np.where(rng.random(rows) < 0.1, account + ' ', account)
+    nominal_code = rng.integers(5000, 8000, rows).astype(float)
+    nominal_code[rng.random(rows) < 0.05] = np.nan
+    body = pd.DataFrame({
+        'N/C:': nominal_code,
+        'No': np.arange(1, rows + 1),
+        'Type': rng.choice(['PI', 'PC', 'JD', 'JC'], rows),
+        'Date': month + pd.to_timedelta(rng.integers(0, 28, rows), unit='D'),
+        'Account ': account,
+        'Ref': [f'INV{i:06d}' for i in rng.integers(0, 10**6, rows)],
+        'Details': 'Synthetic nominal posting',
+        'T/C': rng.choice(['T0', 'T1', 'T9'], rows),
+        'Total': rng.normal(250, 100, rows).round(2),
+        'Supplier Name': [f'{name} Ltd' for name in account],
+        'Company/Account': rng.choice([f'CA{i:05d}' for i in range(mapping_size)], rows),
+    })
+    preamble = pd.DataFrame([[f'Nominal Activity - {month:%B %Y}'], ['Excluding N'], *[['']] * 6])
+    with pd.ExcelWriter(path) as writer:
+        preamble.to_excel(writer, sheet_name='Nominal Activity - Excluding N', index=False, header=False)
+        body.to_excel(writer, sheet_name='Nominal Activity - Excluding N', index=False, startrow=8)
+
+def write_sage_mapping(path, suppliers, mapping_size, seed):
+    """Mapping_Sage.xlsx by Company/Account; ~20% of departments are NULL so the overrides apply."""
+    rng = np.random.default_rng(seed)
+    department = rng.choice(departments, mapping_size).astype(object)
+    department[rng.random(mapping_size) < 0.2] = None
+    pd.DataFrame({
+        'Account ': rng.choice(sage_accounts(suppliers), mapping_size),
+        'Company/Account': [f'CA{i:05d}' for i in range(mapping_size)],
+        'Name': rng.choice(account_names, mapping_size),
+        'Level 1': rng.choice(['Opex', 'Capex'], mapping_size),
+        'Level 2': rng.choice([f'L2 {i}' for i in range(8)], mapping_size),
+        'Level 3': rng.choice([f'L3 {i}' for i in range(30)], mapping_size),
+        'Level 4': rng.choice([f'L4 {i}' for i in range(120)], mapping_size),
+        'Cost Center': np.where(department == None, np.nan, rng.choice(cost_centers, mapping_size)),
+        'Department': department,
+    }).to_excel(path, sheet_name='Sheet1', index=False)
+
+# ==========================================
+# 4. Forecast workbooks (15 descriptive columns, then 24 monthly date headers)
+# ==========================================
+def write_forecast_workbook(path, sheet_name, lines, seed, month=first_month):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Supplier': rng.choice([f'Supplier {i}' for i in range(lines)], lines),
+        'Line': [f'Line {i}' for i in range(lines)],
+        'Department': rng.choice(departments, lines),
+        'Cost Center': rng.choice(cost_centers, lines),
+        'Level 1': rng.choice(['Opex', 'Capex'], lines),
+        'Level 2': rng.choice([f'L2 {i}' for i in range(8)], lines),
+        'Level 3': rng.choice([f'L3 {i}' for i in range(30)], lines),
+        'Level 4': rng.choice([f'L4 {i}' for i in range(120)], lines),
+        **{f'Attribute {i}': rng.choice(['A', 'B', 'C'], lines) for i in range(7)},
+    })
+    for period in pd.date_range(month, periods=24, freq='MS'):
+        df[period.to_pydatetime()] = rng.normal(1000, 400, lines).round(4)
+    df.to_excel(path, sheet_name=sheet_name, index=False)
+
+# ==========================================
+# 5. Generator
+# ==========================================
+def generate(output_directory, seed=0, **scale):
+    """Write a full synthetic raw-data share and return its manifest (scale, directories, file names)."""
+    scale = {**default_scale, **scale}
+    root = Path(output_directory)
+    directories = {name: root / name for name in ('AX', 'SAGE', 'Mapping', 'Forecast')}
+    for directory in directories.values():
+        directory.mkdir(parents=True, exist_ok=True)
+
+    ax_files, sage_files = [], []
+    for i in range(scale['months']):
+        month = first_month + pd.DateOffset(months=i)
+        ax_name = f'{month:%B %Y} - AX.xlsx'
+        write_ax_workbook(directories['AX'] / ax_name, scale['rows'], seed + i,
+                          scale['suppliers'], scale['mapping_size'], month)
+        ax_files.append(ax_name)
+        for j, company in enumerate(['Strike FS', 'Strike']):
+            sage_name = f'{i + 1}.{company} {month:%B %Y} Nominal Activity.xlsx'
+            write_sage_workbook(directories['SAGE'] / sage_name, scale['rows'], seed + 1000 * (j + 1) + i,
+                                scale['suppliers'], scale['mapping_size'], month)
+            sage_files.append(sage_name)
+
+    write_ax_mappings(directories['Mapping'], scale['suppliers'], scale['mapping_size'], seed)
+    write_sage_mapping(directories['Mapping'] / 'Mapping_Sage.xlsx', scale['suppliers'], scale['mapping_size'], seed)
+    write_forecast_workbook(directories['Forecast'] / 'Marketing - Forecast File.xlsx', 'Marketing Spend Consolidated',
+                            scale['forecast_lines'], seed)
+    write_forecast_workbook(directories['Forecast'] / 'Tech - Forecast File.xlsx', 'Tech Spend Consolidated',
+                            scale['forecast_lines'], seed + 1)
+
+    manifest = {
+        'seed': seed,
+        'scale': scale,
+        'directories': {name: str(directory) for name, directory in directories.items()},
+        'ax_files': ax_files,
+        'sage_files': sage_files,
+    }
+    with open(root / manifest_name, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+def read_manifest(output_directory):
+    """The manifest of a previously generated share, or None."""
+    try:
+        with open(Path(output_directory) / manifest_name) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def add_scale_arguments(parser):
+    for name, value in default_scale.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=value)
+    parser.add_argument('--seed', type=int, default=0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic AX, Sage, mapping and forecast workbooks.")
+    parser.add_argument('output_directory', type=Path)
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+    scale = {name: getattr(args, name) for name in default_scale}
+    manifest = generate(args.output_directory, args.seed, **scale)
+    print(f"Wrote {len(manifest['ax_files'])} AX and {len(manifest['sage_files'])} Sage exports "
+          f"({scale['rows']} rows each), mappings and forecasts to {args.output_directory}")
+
+if __name__ == '__main__':
+    main()
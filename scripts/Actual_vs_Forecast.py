@@ -0,0 +1,171 @@
+import json
+import pandas as pd
+import sqlalchemy as sa
+from datetime import datetime
+import database
+from database import get_engine
+from bulk_writer import insert_frame, create_index
+from schema import variance_schema, schema_version, apply_schema, sql_types
+from change_log import change_log_table_name, read_changes, month_filter, last_change_id
+from incremental_load import manifest_table, manifest_table_name, read_manifest, dependency_hash
+from instrumentation import instrumented, span
+import data_lake
+
+# ==========================================
+# 1. Connection details
+# ==========================================
+# Credentials live in database.py, shared by every script; assign another string here to point this one elsewhere
+connection_string = database.connection_string
+
+# ==========================================
+# 2. Configuration
+# ==========================================
+variance_table_name = 'Actual_vs_Forecast'
+actuals_table_name = 'Transactions_Final'
+forecast_table_name = 'Forecast'
+forecast_lines_table_name = 'Forecast_Lines'
+
+# Keys of the variance table, besides the month
+variance_keys = ['Level 1', 'Level 2', 'Level 3', 'Level 4', 'Department', 'Cost Center']
+
+# Forecast_Lines column holding each key; keys without a column are left NULL on forecast rows.
+# 'Department' is the forecast's own department; use 'Department (workbook)' for a sheet's Department column.
+forecast_key_columns = {key: key for key in variance_keys}
+
+# Read the actuals from the lake copy of Transactions_Final (only the changed months' partitions)
+# when it is of the table's last build, instead of grouping them on the server
+use_lake = True
+
+# ==========================================
+# 3. Helper Functions
+# ==========================================
+def configuration_hash():
+    """Hash of the settings that shape the table; a change forces a full rebuild."""
+    return dependency_hash([], json.dumps([variance_keys, forecast_key_columns, schema_version]))
+
+def monthly_totals(df, value_column):
+    """Sum a value by first-of-month Period and the variance keys (NULL keys kept as their own group)."""
+    df['Period'] = pd.to_datetime(df['Period'], format='ISO8601').dt.to_period('M').dt.start_time
+    df = apply_schema(df, variance_schema)
+    return df.groupby(['Period'] + variance_keys, dropna=False, observed=True)[value_column].sum().reset_index()
+
+def read_actuals(connection, periods):
+    """Actual spend per month from the final transactions: read from its lake copy when current,
+    otherwise summed per day in SQL and per month here."""
+    state = data_lake.read_state(actuals_table_name) if use_lake else None
+    if state is not None and state.get('Change_Id') == last_change_id(connection, [actuals_table_name]):
+        actuals = data_lake.read_table(actuals_table_name, ['Date', 'Amount'] + variance_keys, periods)
+        return monthly_totals(actuals.rename(columns={'Date': 'Period', 'Amount': 'Actual'}), 'Actual')
+
+    actuals = sa.table(actuals_table_name, sa.column('Date'), sa.column('Amount'), *[sa.column(key) for key in variance_keys])
+    keys = [actuals.c[key] for key in variance_keys]
+    query = sa.select(actuals.c.Date.label('Period'), *keys, sa.func.sum(actuals.c.Amount).label('Actual'))
+    query = query.group_by(actuals.c.Date, *keys)
+    if periods is not None:
+        query = query.where(month_filter(actuals.c.Date, periods))
+    return monthly_totals(pd.read_sql(query, connection), 'Actual')
+
+def read_forecast(connection, periods):
+    """Forecast amounts joined to their lines' reporting keys, summed per period in SQL."""
+    forecast = sa.table(forecast_table_name, sa.column('Department'), sa.column('Line'), sa.column('Period'), sa.column('Amount'))
+    lines = sa.Table(forecast_lines_table_name, sa.MetaData(), autoload_with=connection)
+    keys, missing = [], []
+    for key in variance_keys:
+        column = forecast_key_columns.get(key)
+        if column in lines.c:
+            keys.append(lines.c[column].label(key))
+        else:
+            keys.append(sa.cast(sa.null(), sa.String(255)).label(key))
+            missing.append(key)
+    if missing:
+        print(f"Forecast lines have no column for {', '.join(missing)}; those keys are NULL on forecast rows.")
+
+    query = (
+        sa.select(forecast.c.Period, *keys, sa.func.sum(forecast.c.Amount).label('Forecast'))
+        .select_from(forecast.join(lines, sa.and_(forecast.c.Department == lines.c.Department, forecast.c.Line == lines.c.Line)))
+        .group_by(forecast.c.Period, *[lines.c[forecast_key_columns[key]] for key in variance_keys if key not in missing])
+    )
+    if periods is not None:
+        query = query.where(month_filter(forecast.c.Period, periods))
+    return monthly_totals(pd.read_sql(query, connection), 'Forecast')
+
+def compute_variance(actuals, forecast):
+    """Join actuals and forecast on month and keys; variance % is relative to the forecast (NULL without one)."""
+    variance = actuals.merge(forecast, on=['Period'] + variance_keys, how='outer')
+    variance[['Actual', 'Forecast']] = variance[['Actual', 'Forecast']].fillna(0)
+    variance['Variance'] = variance['Actual'] - variance['Forecast']
+    variance['Variance %'] = variance['Variance'] / variance['Forecast'].where(variance['Forecast'] != 0) * 100
+    variance['Updated_Timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return apply_schema(variance, variance_schema)
+
+def write_watermark(connection, last_change_id, configuration, row_count):
+    """Record the last change-log entry folded into the table, as its ETL_Load_Manifest row."""
+    if sa.inspect(connection).has_table(manifest_table_name):
+        connection.execute(sa.delete(manifest_table).where(manifest_table.c.Table_Name == variance_table_name))
+    insert_frame(pd.DataFrame({
+        'Table_Name': [variance_table_name],
+        'Source_File': [change_log_table_name],
+        'Content_Hash': [str(last_change_id)],
+        'Dependency_Hash': [configuration],
+        'Row_Count': [row_count],
+        'Loaded_At': [datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
+    }), manifest_table_name, connection)
+
+# ==========================================
+# 4. Main Processing Logic
+# ==========================================
+@instrumented('Actual_vs_Forecast')
+def main():
+    engine = get_engine(connection_string)
+    configuration = configuration_hash()
+
+    # One transaction: readers see the old or the new months, and the watermark moves with them
+    with engine.begin() as connection:
+        inspector = sa.inspect(connection)
+        missing = [name for name in (actuals_table_name, forecast_table_name, forecast_lines_table_name)
+                   if not inspector.has_table(name)]
+        if missing:
+            print(f"Error: {', '.join(missing)} not found; run the upstream stages first.")
+            return
+
+        # Months touched since the last refresh; a new table or changed settings rebuild every month
+        with span('plan') as step:
+            watermark = read_manifest(connection, variance_table_name).get(change_log_table_name)
+            full_rebuild = (watermark is None or watermark[1] != configuration
+                            or not inspector.has_table(variance_table_name))
+            after_change_id = 0 if full_rebuild else int(watermark[0])
+            periods, last_change_id = read_changes(connection, [actuals_table_name, forecast_table_name], after_change_id)
+            step.rows_out = len(periods)
+        if not full_rebuild and not periods:
+            print(f"{variance_table_name} is up to date.")
+            return
+
+        with span('read') as step:
+            actuals = read_actuals(connection, None if full_rebuild else periods)
+            forecast = read_forecast(connection, None if full_rebuild else periods)
+            step.rows_out = len(actuals) + len(forecast)
+
+        with span('transform') as step:
+            variance = compute_variance(actuals, forecast)
+            step.rows_in, step.rows_out = len(actuals) + len(forecast), len(variance)
+
+        with span('export') as step:
+            dtype = {**sql_types(variance, variance_schema), 'Updated_Timestamp': sa.Text()}
+            if full_rebuild:
+                insert_frame(variance, variance_table_name, connection, if_exists='replace', dtype=dtype)
+                create_index(connection, variance_table_name, ['Period'])
+            else:
+                target = sa.table(variance_table_name, sa.column('Period'))
+                connection.execute(sa.delete(target).where(month_filter(target.c.Period, periods)))
+                insert_frame(variance, variance_table_name, connection, dtype=dtype)
+            write_watermark(connection, last_change_id, configuration, len(variance))
+            step.rows_in = len(variance)
+
+    if full_rebuild:
+        print(f"Rebuilt {variance_table_name}: {len(variance)} rows.")
+    else:
+        print(f"Refreshed {len(periods)} month(s) of {variance_table_name}: {len(variance)} rows "
+              f"({', '.join(f'{period:%b %Y}' for period in periods)}).")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import pandas as pd
+from pathlib import Path
+import database
+from database import get_engine
+from bulk_writer import export_to_sql, create_index
+from file_index import find_specific_excel_file
+from excel_ingest import load_in_parallel
+from forecast_engine import read_forecast_workbook, wide_forecast, changed_periods
+from schema import forecast_schema, apply_schema, sql_types
+from instrumentation import instrumented, span, file_bytes
+from change_log import record_changed_periods
+
+# ==========================================
+# 1. Connection details
+# ==========================================
+# Credentials live in database.py, shared by every script; assign another string here to point this one elsewhere
+connection_string = database.connection_string
+
+# ==========================================
+# 2. Configuration
+# ==========================================
+# One line per department forecast workbook (anonymized directories)
+forecast_workbooks = [
+    {'department': 'Marketing', 'directory': r'C:\Users\YourUser\Path\To\Forecast Modelling\Marketing', 'file_name': 'Marketing - Forecast File.xlsx', 'sheet_name': 'Marketing Spend Consolidated'},
+    {'department': 'Tech', 'directory': r'C:\Users\YourUser\Path\To\Forecast Modelling\Tech', 'file_name': 'Tech - Forecast File.xlsx', 'sheet_name': 'Tech Spend Consolidated'},
+]
+
+# Long table (Department, Line, Period, Amount) and the descriptive columns of each line
+forecast_table_name = 'Forecast'
+forecast_lines_table_name = 'Forecast_Lines'
+
+# Also write the old wide Forecast_<Department> tables, for reports not yet moved to the long table
+write_wide_tables = False
+
+# Number of processes used to parse the workbooks (None = one per CPU, 1 = serial)
+max_workers = None
+
+# ==========================================
+# 3. Processing Logic
+# ==========================================
+def find_forecast_files():
+    """Path of each configured workbook, or None where it was not found."""
+    found = {}
+    for workbook in forecast_workbooks:
+        excel_files = find_specific_excel_file(workbook['directory'], workbook['file_name'])
+        found[workbook['department']] = excel_files[0] if excel_files else None
+    return found
+
+def input_files():
+    """The forecast workbooks this stage reads, for the pipeline runner's up-to-date check."""
+    return [path for path in find_forecast_files().values() if path is not None]
+
+def watch_directories():
+    """Directories where updated forecast workbooks land, for watch_folders.py."""
+    return sorted({Path(workbook['directory']) for workbook in forecast_workbooks})
+
+@instrumented('Forecasts')
+def main():
+    with span('discovery') as step:
+        found = find_forecast_files()
+        step.rows_out = sum(path is not None for path in found.values())
+
+    missing = [department for department, path in found.items() if path is None]
+    if missing:
+        # Replacing the table without a department would drop its forecast from the reports
+        print(f"Error: No forecast workbook found for {', '.join(missing)}.")
+        return
+
+    # Parse every department's workbook in parallel and unpivot its date columns
+    with span('read') as step:
+        file_paths = [found[workbook['department']] for workbook in forecast_workbooks]
+        results = load_in_parallel(
+            read_forecast_workbook, file_paths, max_workers=max_workers,
+            file_kwargs=[{'sheet_name': workbook['sheet_name'], 'department': workbook['department']}
+                         for workbook in forecast_workbooks]
+        )
+        step.rows_out = sum(len(lines) for lines, _ in results)
+        step.bytes_read = file_bytes(file_paths)
+
+    with span('transform') as step:
+        forecast_lines = pd.concat([lines for lines, _ in results], ignore_index=True)
+        forecast = apply_schema(pd.concat([amounts for _, amounts in results], ignore_index=True), forecast_schema)
+        step.rows_in, step.rows_out = len(forecast_lines), len(forecast)
+
+    # Periods that differ from the current tables, logged for Actual_vs_Forecast once the export succeeds
+    engine = get_engine(connection_string)
+    with span('compare') as step, engine.connect() as connection:
+        periods = changed_periods(connection, forecast, forecast_lines, forecast_table_name, forecast_lines_table_name)
+        step.rows_in, step.rows_out = len(forecast), len(periods)
+
+    with span('export') as step:
+        export_to_sql(forecast, forecast_table_name, connection_string, dtype=sql_types(forecast, forecast_schema))
+        export_to_sql(forecast_lines, forecast_lines_table_name, connection_string,
+                      dtype=sql_types(forecast_lines, forecast_schema))
+        with engine.begin() as connection:
+            create_index(connection, forecast_table_name, ['Department', 'Period'])
+            record_changed_periods(connection, forecast_table_name, periods)
+        if write_wide_tables:
+            for workbook, (lines, amounts) in zip(forecast_workbooks, results):
+                export_to_sql(wide_forecast(lines, amounts), f"Forecast_{workbook['department']}", connection_string)
+        step.rows_in = len(forecast)
+
+    print(f"Exported {len(forecast)} forecast amounts for {len(forecast_workbooks)} departments to SQL.")
+
+if __name__ == '__main__':
+    main()
@@ -1,54 +1,24 @@
-from sqlalchemy import create_engine
 import pandas as pd
 import re
 from pathlib import Path
-from urllib.parse import quote_plus
+from file_index import find_specific_excel_file, get_file_index
+from excel_ingest import read_excel_data, read_ax_transactions, iter_ax_transactions, load_in_parallel, load_file
+from workbook_cache import WorkbookCache
+from mapping_engine import Lookup, MappingEngine
+import database
+from database import get_engine
+from schema import transactions_ax_schema, schema_version, apply_schema, sql_types
+from instrumentation import instrumented, span, file_bytes
+from incremental_load import source_hashes, dependency_hash, tag_source, plan_incremental_load, apply_incremental_load
 
 # ==========================================
-# 1. Credentials and connection details
+# 1. Connection details
 # ==========================================
-username = 'YOUR_USERNAME'
-password = quote_plus('YOUR_PASSWORD')  # URL encode the password
-hostname = 'your-server-name.database.windows.net'
-database_name = 'YourDatabaseName'
-driver = quote_plus('ODBC Driver 17 for SQL Server') 
-
-# Construct the connection string
-connection_string = f"mssql+pyodbc://{username}:{password}@{hostname}/{database_name}?driver={driver}"
-
-# ==========================================
-# 2. Helper Functions
-# ==========================================
-def find_specific_excel_file(base_dir, file_name):
-    """Find a specific Excel file in a designated directory."""
-    full_path = Path(base_dir)
-    excel_files = [file for file in full_path.rglob(file_name)]
-    print(f"Looking in: {full_path}") 
-    print(f"Files found: {excel_files}")
-    return excel_files
-
-def export_to_sql(df, table_name, sql_connection_string, if_exists='replace'):
-    """Export DataFrame to a SQL table."""
-    engine = create_engine(sql_connection_string)
-    df.to_sql(table_name, con=engine, if_exists=if_exists, index=False)
-    print(f"Data has been exported to the SQL table: {table_name}")
-
-def read_excel_data(file_path, sheet_name, start_row, columns):
-    """Read specific data from an Excel file."""
-    df = pd.read_excel(file_path, sheet_name=sheet_name, skiprows=start_row-1)
-    
-    # Select only the required columns that actually exist in the file
-    existing_cols = [c for c in columns if c in df.columns]
-    df = df[existing_cols]
-    
-    # Format the date column if it exists
-    if 'Date' in df.columns:
-        df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%d/%m/%Y')
-        
-    return df
+# Credentials live in database.py, shared by every script; assign another string here to point this one elsewhere
+connection_string = database.connection_string
 
 # ==========================================
-# 3. Configuration & Paths
+# 2. Configuration & Paths
 # ==========================================
 raw_data_directory = r'C:\Users\YourUser\Path\To\Raw_Data\AX'
 supplier_mapping_directory = r'C:\Users\YourUser\Path\To\Supplier_Mapping'
@@ -61,78 +31,189 @@ transactions_files = [
     '13.January 2025 - AX.xlsx'
 ]
 
+# Regex matched against file names to pick up every monthly export without listing them,
+# e.g. r'(\d+\.)?[A-Za-z]+ \d{4} - AX\.xlsx'; when None the transactions_files list is used
+transactions_file_pattern = None
+
 mapping_file_name = 'Mapping_Consolidated.xlsx'
 mapping_supplier_file_name = 'Mapping_AX.xlsx'
 
+# Number of processes used to parse the monthly exports (None = one per CPU, 1 = serial)
+max_workers = None
+
+# Serve unchanged workbooks from the local parsed-workbook cache instead of re-parsing them
+use_workbook_cache = True
+
+# 'incremental' reloads only the workbooks whose contents changed since the last run; 'replace' rewrites the table
+load_mode = 'incremental'
+
+# 'in_memory' reads every changed export before mapping and writing them; 'streaming' pushes each export
+# through filter, mapping, cleanup and the SQL insert in batches of stream_batch_size rows, so peak memory
+# is bounded by the batch size instead of the data volume (exports are read serially, bypassing the workbook cache)
+processing_mode = 'in_memory'
+stream_batch_size = 50000
+
+# Also keep the table as month-partitioned Parquet in the local lake (data_lake.py), where
+# Transactions_Final reads it instead of pulling the table back from the server
+use_lake = True
+
 # ==========================================
-# 4. Main Processing Logic
+# 3. Main Processing Logic
 # ==========================================
-
-# Find the files
-transactions_excel_files = []
-for f_name in transactions_files:
-    transactions_excel_files += find_specific_excel_file(raw_data_directory, f_name)
-
-mapping_excel_files = find_specific_excel_file(supplier_mapping_directory, mapping_file_name)
-mapping_supplier_excel_files = find_specific_excel_file(supplier_mapping_directory, mapping_supplier_file_name)
-
-if transactions_excel_files and mapping_excel_files and mapping_supplier_excel_files:
-    # Setup column requirements
-    transactions_columns = [
-        'Journal number', 'Voucher', 'Date', 'Year closed', 'Ledger account',
-        'Account name', 'Description', 'Currency', 'Amount in transaction currency',
-        'Amount', 'Amount in reporting currency', 'Posting type', 'Posting layer',
-        'Supplier Name AX', 'Supplier Account AX', 'MainAccount', 'Supplier Required', 'Ledger Code'
-    ]
-    
+def read_mappings(mapping_file, mapping_supplier_file, cache=None):
+    """Read the consolidated (MainAccount) and supplier (Supplier Name AX) mapping tables."""
     mapping_columns = ['MainAccount', 'Company', 'FS type', 'Level 1', 'Level 2', 'Level 3', 'Level 4']
     mapping_supplier_columns = ['Supplier Name AX', 'Department', 'Cost Center']
+    mapping_df = load_file(read_excel_data, mapping_file, cache=cache,
+                           sheet_name='Sheet1', start_row=1, columns=mapping_columns)
+    mapping_supplier_df = load_file(read_excel_data, mapping_supplier_file, cache=cache,
+                                    sheet_name='Sheet1', start_row=1, columns=mapping_supplier_columns)
+    return mapping_df, mapping_supplier_df
+
+def build_mapping_engine(mapping_df, mapping_supplier_df):
+    """1. Main Mapping (on MainAccount), 2. Supplier Mapping (on Supplier Name AX)."""
+    # Each mapping is indexed once on its key (first row per key, so no row explosion) and joined in one pass
+    return MappingEngine([
+        Lookup('Mapping_Consolidated', mapping_df, key='MainAccount'),
+        Lookup('Mapping_AX', mapping_supplier_df, key='Supplier Name AX'),
+    ])
 
-    # Load and concatenate Transactions
-    transactions_dfs = []
-    for path in transactions_excel_files:
-        df = read_excel_data(path, 'Sheet1', 1, transactions_columns)
-        # Filter: Supplier Required is True and Ledger Code > 5
-        df = df[(df['Supplier Required'] == True) & (df['Ledger Code'] > 5)]
-        transactions_dfs.append(df)
-        
-    transactions_df = pd.concat(transactions_dfs, ignore_index=True)
-    
-    # Load Mapping Files
-    mapping_df = read_excel_data(mapping_excel_files[0], 'Sheet1', 1, mapping_columns)
-    mapping_supplier_df = read_excel_data(mapping_supplier_excel_files[0], 'Sheet1', 1, mapping_supplier_columns)
-    
-    # ---------------------------------------------------------
-    # IMPROVED JOIN LOGIC
-    # ---------------------------------------------------------
-    # 1. Join with Main Mapping (on MainAccount)
-    merged_df = pd.merge(transactions_df, mapping_df, on='MainAccount', how='left')
-    
-    # 2. Join with Supplier Mapping (on Supplier Name AX)
-    # Ensure no duplicates in lookup to avoid row explosion
-    mapping_supplier_lookup = mapping_supplier_df.drop_duplicates('Supplier Name AX')
-    merged_df = pd.merge(merged_df, mapping_supplier_lookup, on='Supplier Name AX', how='left')
-    
+def clean_transactions(merged_df):
+    """Final cleanup of mapped transactions before the SQL export."""
     # Clean up formatting
     merged_df['Description'] = merged_df['Description'].astype(str)
-    
-    # Format Cost Center to remove .0 decimals
-    def clean_cost_center(x):
-        try:
-            if pd.notnull(x) and x != '':
-                return str(int(float(x)))
-            return x
-        except:
-            return str(x)
-
-    if 'Cost Center' in merged_df.columns:
-        merged_df['Cost Center'] = merged_df['Cost Center'].apply(clean_cost_center)
-    
-    # ---------------------------------------------------------
-    # 5. Export to SQL
-    # ---------------------------------------------------------
-    export_to_sql(merged_df, 'Transactions_AX', connection_string)
-    print("Process complete!")
-
-else:
-    print("Error: One or more required Excel files were not found.")
\ No newline at end of file
+
+    # Compact dtypes: categorical hierarchy, whole-number Cost Center (drops the .0 decimals), fixed-precision amounts
+    return apply_schema(merged_df, transactions_ax_schema)
+
+def stream_transactions(files_to_load, hashes, columns, mapping_engine):
+    """Yield the mapped, cleaned transactions of every export one bounded batch at a time."""
+    batches = (
+        tag_source(df, path, hashes[Path(path).name])
+        for path in files_to_load
+        for df in iter_ax_transactions(path, columns, transactions_ax_schema, stream_batch_size)
+    )
+    for merged_df in mapping_engine.apply_batches(batches):
+        yield clean_transactions(merged_df)
+
+def find_input_files():
+    """Locate the monthly exports and the two mapping workbooks."""
+    if transactions_file_pattern:
+        transactions_excel_files = get_file_index(raw_data_directory).find_regex(transactions_file_pattern)
+    else:
+        transactions_excel_files = []
+        for f_name in transactions_files:
+            transactions_excel_files += find_specific_excel_file(raw_data_directory, f_name)
+
+    mapping_excel_files = find_specific_excel_file(supplier_mapping_directory, mapping_file_name)
+    mapping_supplier_excel_files = find_specific_excel_file(supplier_mapping_directory, mapping_supplier_file_name)
+    return transactions_excel_files, mapping_excel_files, mapping_supplier_excel_files
+
+def input_files():
+    """Every workbook this stage reads, for the pipeline runner's up-to-date check."""
+    return [path for files in find_input_files() for path in files]
+
+def watch_directories():
+    """Directories where new or updated inputs of this stage land, for watch_folders.py."""
+    return [Path(raw_data_directory), Path(supplier_mapping_directory)]
+
+@instrumented('Transactions_AX')
+def main():
+    # Find the files
+    with span('discovery') as step:
+        transactions_excel_files, mapping_excel_files, mapping_supplier_excel_files = find_input_files()
+        step.rows_out = len(transactions_excel_files)
+
+    if transactions_excel_files and mapping_excel_files and mapping_supplier_excel_files:
+        engine = get_engine(connection_string)
+        cache = WorkbookCache() if use_workbook_cache else None
+
+        # Work out which monthly exports changed since the last load (mapping edits invalidate every month)
+        with span('plan') as step:
+            hashes = source_hashes(transactions_excel_files)
+            mapping_hash = dependency_hash([mapping_excel_files[0], mapping_supplier_excel_files[0]], schema_version)
+            full_refresh = load_mode == 'replace'
+            changed, removed = plan_incremental_load(engine, 'Transactions_AX', hashes, mapping_hash, full_refresh, use_lake)
+            step.rows_in, step.rows_out = len(hashes), len(changed)
+        if not changed and not removed:
+            print("Transactions_AX is already up to date.")
+            return
+        files_to_load = [path for path in transactions_excel_files if Path(path).name in changed]
+
+        # Setup column requirements
+        transactions_columns = [
+            'Journal number', 'Voucher', 'Date', 'Year closed', 'Ledger account',
+            'Account name', 'Description', 'Currency', 'Amount in transaction currency',
+            'Amount', 'Amount in reporting currency', 'Posting type', 'Posting layer',
+            'Supplier Name AX', 'Supplier Account AX', 'MainAccount', 'Supplier Required', 'Ledger Code'
+        ]
+
+        if processing_mode == 'streaming':
+            # Mappings are held in memory once; the exports never are
+            with span('read') as step:
+                mapping_df, mapping_supplier_df = read_mappings(mapping_excel_files[0], mapping_supplier_excel_files[0], cache)
+                step.rows_out = len(mapping_df) + len(mapping_supplier_df)
+                step.bytes_read = file_bytes([mapping_excel_files[0], mapping_supplier_excel_files[0]])
+            mapping_engine = build_mapping_engine(mapping_df, mapping_supplier_df)
+
+            # Filter, mapping, cleanup and the SQL insert all run inside this span, batch by batch
+            with span('stream') as step:
+                batches = stream_transactions(files_to_load, hashes, transactions_columns, mapping_engine)
+                step.rows_in = apply_incremental_load(engine, 'Transactions_AX', batches, hashes, changed, removed,
+                                                      mapping_hash, full_refresh,
+                                                      dtype=sql_types(None, transactions_ax_schema), use_lake=use_lake)
+                step.bytes_read = file_bytes(files_to_load)
+            if cache is not None:
+                cache.report()
+            print("Process complete!")
+            return
+
+        # Load and concatenate Transactions (parsed and filtered in parallel worker processes;
+        # each worker applies the Supplier Required / Ledger Code filter to its parsed export, so it is timed here)
+        with span('read') as step:
+            transactions_dfs = load_in_parallel(
+                read_ax_transactions, files_to_load,
+                max_workers=max_workers, cache=cache, columns=transactions_columns, schema=transactions_ax_schema
+            )
+            transactions_dfs = [tag_source(df, path, hashes[Path(path).name]) for df, path in zip(transactions_dfs, files_to_load)]
+
+            if transactions_dfs:
+                transactions_df = pd.concat(transactions_dfs, ignore_index=True)
+            else:
+                # Only removed months: nothing to insert, their partitions are just deleted
+                transactions_df = pd.DataFrame(columns=transactions_columns)
+
+            # Load Mapping Files
+            mapping_df, mapping_supplier_df = read_mappings(mapping_excel_files[0], mapping_supplier_excel_files[0], cache)
+            step.rows_out = len(transactions_df)
+            step.bytes_read = file_bytes(files_to_load + [mapping_excel_files[0], mapping_supplier_excel_files[0]])
+
+        # ---------------------------------------------------------
+        # IMPROVED JOIN LOGIC
+        # ---------------------------------------------------------
+        # 1. Main Mapping (on MainAccount), 2. Supplier Mapping (on Supplier Name AX)
+        with span('merge') as step:
+            mapping_engine = build_mapping_engine(mapping_df, mapping_supplier_df)
+            merged_df = mapping_engine.apply(transactions_df)
+            step.rows_in, step.rows_out = len(transactions_df), len(merged_df)
+
+        with span('transform') as step:
+            merged_df = clean_transactions(merged_df)
+            step.rows_in = step.rows_out = len(merged_df)
+
+        # ---------------------------------------------------------
+        # 4. Export to SQL
+        # ---------------------------------------------------------
+        with span('export') as step:
+            apply_incremental_load(engine, 'Transactions_AX', merged_df, hashes, changed, removed, mapping_hash, full_refresh,
+                                   dtype=sql_types(merged_df, transactions_ax_schema), use_lake=use_lake)
+            step.rows_in = len(merged_df)
+        if cache is not None:
+            cache.report()
+        print("Process complete!")
+
+    else:
+        print("Error: One or more required Excel files were not found.")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
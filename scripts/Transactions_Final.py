@@ -1,97 +1,418 @@
-from urllib.parse import quote_plus
-from sqlalchemy import create_engine
+import numpy as np
 import pandas as pd
+import sqlalchemy as sa
+from schema import transactions_final_schema, sql_column_types, apply_schema
+import database
+from database import get_engine, read_sql, run_concurrently
+from bulk_writer import export_to_sql, insert_frame, swap_tables, create_index
+from instrumentation import instrumented, span
+from change_log import record_changed_periods, last_change_id
+from change_detection import row_fingerprints, diff_fingerprints
+from rollups import refresh_rollup, reconcile_rollups
+from incremental_load import lake_in_sync
+import data_lake
 from pathlib import Path
 from datetime import datetime
 
 # ==========================================
-# 1. Credentials and connection details
+# 1. Connection details
 # ==========================================
-# Anonymized credentials
-username = 'YOUR_USERNAME'
-password = quote_plus('YOUR_PASSWORD') # URL encode the password
-hostname = 'your-server-name.database.windows.net'
-database_name = 'Finance'
-driver = quote_plus('ODBC Driver 17 for SQL Server') # URL encode the driver name
-
-# Construct the connection string with URL encoding
-connection_string = f"mssql+pyodbc://{username}:{password}@{hostname}/{database_name}?driver={driver}"
+# Credentials live in database.py, shared by every script; assign another string here to point this one elsewhere
+connection_string = database.connection_string
 
 # ==========================================
-# 2. Helper Functions
+# 2. Final Table Schema
 # ==========================================
-def export_to_sql(df, table_name, sql_connection_string, if_exists='replace'):
-    """Export DataFrame to a SQL table."""
-    engine = create_engine(sql_connection_string)
-    df.to_sql(table_name, con=engine, if_exists=if_exists, index=False)
-    print(f"Data has been exported to the SQL table {table_name}.")
-
-def read_sql_table(sql_connection_string, table_name, columns):
-    """Read specific columns from a SQL table."""
-    engine = create_engine(sql_connection_string)
-    # Escaping column names with square brackets for SQL Server compatibility
-    columns_escaped = ", ".join([f"[{column}]" for column in columns])
-    query = f"SELECT {columns_escaped} FROM [{table_name}]"
-    df = pd.read_sql(query, con=engine)
-    return df
+final_table_name = 'Transactions_Final'
 
-# ==========================================
-# 3. Process Transactions_AX
-# ==========================================
-# Read data from 'Transactions_AX' table
+# Source columns of 'Transactions_AX' and 'Transactions_Sage' renamed to match the final table schema
 transactions_ax_columns = [
     'Company', 'Date', 'Supplier Account AX', 'Amount in reporting currency', 
     'Supplier Name AX', 'Account name', 'Level 1', 'Level 2', 'Level 3', 
     'Level 4', 'MainAccount', 'Department', 'Cost Center', 'Posting type'
 ]
-transactions_ax_df = read_sql_table(connection_string, 'Transactions_AX', transactions_ax_columns)
-
-# Rename columns to match the final table schema
-transactions_ax_df.rename(columns={
+transactions_ax_renames = {
     'Supplier Account AX': 'Supplier Account',
     'Amount in reporting currency': 'Amount',
     'Supplier Name AX': 'Supplier Name',
     'Account name': 'Account Name',
     'MainAccount': 'Main Account'
-}, inplace=True)
+}
 
-# ==========================================
-# 4. Process Transactions_Sage
-# ==========================================
-# Read data from 'Transactions_Sage' table
 transactions_sage_columns = [
     'Company', 'Date', 'Account', 'Total', 'Supplier Name',
     'Name', 'Level 1', 'Level 2', 'Level 3', 'Level 4', 'N/C:', 
     'Department', 'Cost Center', 'Type'
 ]
-transactions_sage_df = read_sql_table(connection_string, 'Transactions_Sage', transactions_sage_columns)
-
-# Rename columns to match the final table schema
-transactions_sage_df.rename(columns={
+transactions_sage_renames = {
     'Account': 'Supplier Account',
     'Total': 'Amount',
     'Name': 'Account Name',
     'N/C:': 'Main Account',
     'Type': 'Posting type'
-}, inplace=True)
+}
+
+# Column types of the final table, in output order (None = taken from the declared schema)
+final_columns = {
+    'Company': None, 'Date': None, 'Supplier Account': sa.Text(), 'Amount': None,
+    'Supplier Name': sa.Text(), 'Account Name': None, 'Level 1': None, 'Level 2': None,
+    'Level 3': None, 'Level 4': None, 'Main Account': sa.Float(), 'Department': None,
+    'Cost Center': None, 'Posting type': None, 'Updated_Timestamp': sa.Text()
+}
+final_columns.update({name: sql_column_types[kind] for name, kind in transactions_final_schema.items()})
+
+# Columns whose changes count as a change to the row (everything but the timestamp)
+business_columns = [name for name in final_columns if name != 'Updated_Timestamp']
+
+# Columns identifying a row from one load to the next; a change to any other business column is an update
+row_key_columns = ['Company', 'Date', 'Supplier Account', 'Main Account', 'Posting type']
+
+# Fingerprint columns added by the incremental build (change_detection.py)
+fingerprint_columns = {'Row_Key': sa.BigInteger(), 'Key_Hash': sa.BigInteger(), 'Row_Hash': sa.BigInteger()}
+
+# Keys inserted, updated or deleted by the last incremental build, for downstream refreshes
+delta_table_name = 'Transactions_Final_Delta'
+delta_columns = {'Row_Key': sa.BigInteger(), 'Date': sa.Date(), 'Change_Type': sa.String(10), 'Updated_Timestamp': sa.Text()}
+
+# Source amounts carry at most 4 decimals (schema.amount_precision). Moving them a tenth of that last digit away
+# from zero before rounding to the cent sends a half cent away from zero, as SQL Server's ROUND does on the
+# Numeric column, in pandas and in SQL alike (a float's binary value can sit either side of the half)
+amount_rounding_nudge = 0.00001
 
 # ==========================================
-# 5. Combine and Finalize
+# 3. Configuration
 # ==========================================
-# Combine data from both tables
-transactions_final_df = pd.concat([transactions_ax_df, transactions_sage_df], ignore_index=True)
+# 'incremental' applies only the rows that changed since the last build, keeping the others' Updated_Timestamp;
+# 'pushdown' rebuilds the table with one INSERT ... SELECT on the server (falling back to 'streaming'
+# if the database rejects it), 'streaming' copies it in chunks, 'in_memory' loads both tables into pandas
+build_mode = 'incremental'
 
-# Fill None values in 'Cost Center' with 0 and then convert to integer
-transactions_final_df['Cost Center'] = transactions_final_df['Cost Center'].fillna(0).astype(int)
+# Rows per chunk for the streaming path
+chunk_size = 50000
 
-# Update 'Amount' to have 2 decimal places
-transactions_final_df['Amount'] = transactions_final_df['Amount'].round(2)
+# Monthly summary tables (Period, keys, Amount, Row_Count) kept in step with the final table;
+# each build regroups only the months whose rows changed
+rollup_tables = {
+    'Transactions_Final_Monthly_Hierarchy': ['Company', 'Level 1', 'Level 2', 'Level 3', 'Level 4', 'Department'],
+    'Transactions_Final_Monthly_Supplier': ['Company', 'Supplier Name'],
+    'Transactions_Final_Monthly_Cost_Center': ['Company', 'Cost Center'],
+}
 
-# Add the updated_timestamp column
-transactions_final_df['Updated_Timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+# Regroup every month of the rollups on the next build (e.g. after changing rollup_tables)
+rebuild_rollups = False
 
-# Export the combined data to 'Transactions_Final' table
-final_table_name = 'Transactions_Final'
-export_to_sql(transactions_final_df, final_table_name, connection_string, if_exists='replace')
+# Check after each build that the regrouped months of every rollup match the final table's totals for those
+# months (every month with rebuild_rollups; fails the build if not)
+check_rollups = True
+
+# Read Transactions_AX / Transactions_Sage from the local Parquet lake when its copy matches the server's
+# (falling back to SQL otherwise), and keep this table there too, month-partitioned, for the rollups and
+# Actual_vs_Forecast. The 'pushdown' and 'streaming' builds stay on the server and leave the lake copy stale.
+use_lake = True
+
+# ==========================================
+# 4. Helper Functions
+# ==========================================
+def iter_sql_chunks(sql_connection_string, query, chunksize):
+    """Yield a query's rows chunk by chunk; the connection goes back to the pool after the last one."""
+    # Server-side cursor so only one chunk is held in client memory at a time
+    with get_engine(sql_connection_string).connect() as connection:
+        yield from pd.read_sql(query, con=connection.execution_options(stream_results=True), chunksize=chunksize)
+
+def read_sql_table(sql_connection_string, table_name, columns, chunksize=None):
+    """Read specific columns from a SQL table, optionally as an iterator of chunks."""
+    # Escaping column names with square brackets for SQL Server compatibility
+    columns_escaped = ", ".join([f"[{column}]" for column in columns])
+    query = f"SELECT {columns_escaped} FROM [{table_name}]"
+    if chunksize is None:
+        # Retried on transient disconnects (a chunked read cannot be, its chunks are already consumed)
+        return read_sql(query, sql_connection_string)
+    return iter_sql_chunks(sql_connection_string, query, chunksize)
+
+def read_source_table(table_name, columns):
+    """Read a source table from its lake copy when that holds what the server holds, else from SQL."""
+    if use_lake:
+        with get_engine(connection_string).connect() as connection:
+            in_sync = lake_in_sync(connection, table_name)
+        if in_sync:
+            return data_lake.read_table(table_name, columns)
+        print(f"{table_name}: no up-to-date lake copy, reading the table from SQL.")
+    return read_sql_table(connection_string, table_name, columns)
+
+def finalize_frame(df, renames, updated_timestamp):
+    """Apply the final-table renames, Cost Center/Amount cleanup and timestamp to one frame."""
+    df = df.rename(columns=renames)
+
+    # Fill None values in 'Cost Center' with 0 and then convert to integer
+    df['Cost Center'] = df['Cost Center'].fillna(0).astype(int)
+
+    # Update 'Amount' to have 2 decimal places
+    df['Amount'] = (df['Amount'] + np.sign(df['Amount']) * amount_rounding_nudge).round(2)
+
+    # Add the updated_timestamp column
+    df['Updated_Timestamp'] = updated_timestamp
+    return apply_schema(df[list(final_columns)], transactions_final_schema)
+
+def create_staging_table(connection, columns=final_columns):
+    """(Re)create an empty staging table with the final schema."""
+    staging_table = sa.Table(
+        f"{final_table_name}_Staging", sa.MetaData(),
+        *[sa.Column(name, column_type) for name, column_type in columns.items()]
+    )
+    staging_table.drop(connection, checkfirst=True)
+    staging_table.create(connection)
+    return staging_table
+
+def source_select(table_name, columns, renames, updated_timestamp):
+    """SELECT one source table in the final table's shape, with the cleanup done in SQL."""
+    source = sa.table(table_name, *[sa.column(name) for name in columns])
+    expressions = {renames.get(name, name): source.c[name] for name in columns}
+    expressions['Cost Center'] = sa.cast(sa.func.coalesce(expressions['Cost Center'], 0), sa.Integer)
+    amount = expressions['Amount']
+    expressions['Amount'] = sa.func.round(amount + sa.case((amount < 0, -amount_rounding_nudge), else_=amount_rounding_nudge), 2)
+    expressions['Updated_Timestamp'] = sa.literal(updated_timestamp, sa.Text)
+    return sa.select(*[expressions[name].label(name) for name in final_columns])
+
+def table_dates(connection, table_name):
+    """Distinct dates of a table, or none when it does not exist yet."""
+    if not sa.inspect(connection).has_table(table_name):
+        return []
+    table = sa.table(table_name, sa.column('Date'))
+    return [row[0] for row in connection.execute(sa.select(table.c.Date).distinct())]
+
+def changed_dates(connection, staging_name):
+    """Dates of the rows added or removed between the current final table and the staging table.
+
+    Compared on every column but Updated_Timestamp, on the server; every date is
+    changed when there is no final table yet.
+    """
+    if not sa.inspect(connection).has_table(final_table_name):
+        return table_dates(connection, staging_name)
+    staging = sa.table(staging_name, *[sa.column(name) for name in business_columns])
+    final = sa.table(final_table_name, *[sa.column(name) for name in business_columns])
+    dates = set()
+    for new, old in [(staging, final), (final, staging)]:
+        difference = sa.except_(sa.select(*new.c), sa.select(*old.c)).subquery()
+        dates.update(row[0] for row in connection.execute(sa.select(difference.c.Date).distinct()))
+    return dates
+
+def read_fingerprints(connection, columns=('Date',)):
+    """Fingerprints and the given columns of every row of the final table; None when it has no fingerprints."""
+    inspector = sa.inspect(connection)
+    if not inspector.has_table(final_table_name):
+        return None
+    if not set(fingerprint_columns) <= {column['name'] for column in inspector.get_columns(final_table_name)}:
+        return None
+    final = sa.table(final_table_name, *[sa.column(name) for name in [*fingerprint_columns, *columns]])
+    old = pd.read_sql(sa.select(*final.c), connection)
+    return apply_schema(old, {'Date': 'date'})
+
+def write_lake_copy(connection, transactions_final_df, periods, previous_change_id):
+    """Rewrite the changed months of the table's lake copy (all of it when the copy is not of the previous build).
+
+    The copy is tagged with the last change-log id, which readers compare with the server's.
+    """
+    state = data_lake.read_state(final_table_name)
+    data_lake.invalidate(final_table_name)
+    if state is None or state.get('Change_Id') != previous_change_id:
+        data_lake.drop_table(final_table_name)
+        rows, periods = transactions_final_df, None
+    else:
+        rows = transactions_final_df[data_lake.month_labels(transactions_final_df['Date']).isin(
+            [data_lake.period_label(period) for period in periods]).to_numpy()]
+    data_lake.write_partitions(rows, final_table_name, replace_periods=periods)
+    data_lake.write_state(final_table_name, {'Change_Id': last_change_id(connection, [final_table_name])})
+    return len(rows)
+
+def refresh_summaries(connection, dates, transactions_final_df=None):
+    """Log the months of the changed rows, update the lake copy and regroup those months of the rollups,
+    on the build's transaction.
+
+    transactions_final_df is the whole new table, as written to SQL; without it
+    (a build done on the server) the lake copy is marked stale.
+    """
+    previous_change_id = last_change_id(connection, [final_table_name])
+    periods = record_changed_periods(connection, final_table_name, dates)
+    # Rollups and downstream refreshes read the final table by date range
+    create_index(connection, final_table_name, ['Date'])
+    in_lake = use_lake and transactions_final_df is not None
+    if in_lake:
+        with span('lake') as step:
+            step.rows_out = write_lake_copy(connection, transactions_final_df, periods, previous_change_id)
+    elif use_lake:
+        data_lake.invalidate(final_table_name)
+    regrouped = None if rebuild_rollups else periods
+    with span('rollups') as step:
+        step.rows_out = sum(
+            refresh_rollup(connection, rollup_name, final_table_name, keys, transactions_final_schema, regrouped, in_lake)
+            for rollup_name, keys in rollup_tables.items()
+        )
+        if check_rollups:
+            mismatches = reconcile_rollups(connection, final_table_name, list(rollup_tables), regrouped)
+            if mismatches:
+                details = '; '.join(f"{name}: {', '.join(map(str, months))}" for name, months in mismatches.items())
+                raise ValueError(f"Rollups do not reconcile with {final_table_name} ({details}); "
+                                 f"set rebuild_rollups = True to regroup every month.")
+
+# ==========================================
+# 5. Build Modes
+# ==========================================
+def build_final_pushdown(engine, updated_timestamp):
+    """Build the final table with a single server-side INSERT ... SELECT ... UNION ALL.
+
+    Amounts are rounded to the cent as the other build modes round them (see amount_rounding_nudge).
+    """
+    with span('export') as step, engine.begin() as connection:
+        staging_table = create_staging_table(connection)
+        union = sa.union_all(
+            source_select('Transactions_AX', transactions_ax_columns, transactions_ax_renames, updated_timestamp),
+            source_select('Transactions_Sage', transactions_sage_columns, transactions_sage_renames, updated_timestamp),
+        )
+        result = connection.execute(staging_table.insert().from_select(list(final_columns), union))
+        dates = changed_dates(connection, staging_table.name)
+        swap_tables(connection, staging_table.name, final_table_name)
+        refresh_summaries(connection, dates)
+        step.rows_out = result.rowcount
+
+def build_final_streaming(engine, updated_timestamp):
+    """Copy both source tables into the final table chunk by chunk."""
+    with span('export') as step, engine.begin() as connection:
+        staging_table = create_staging_table(connection)
+        rows = 0
+        for table_name, columns, renames in [
+            ('Transactions_AX', transactions_ax_columns, transactions_ax_renames),
+            ('Transactions_Sage', transactions_sage_columns, transactions_sage_renames),
+        ]:
+            for chunk in read_sql_table(connection_string, table_name, columns, chunksize=chunk_size):
+                insert_frame(finalize_frame(chunk, renames, updated_timestamp), staging_table.name, connection,
+                             dtype=final_columns)
+                rows += len(chunk)
+        dates = changed_dates(connection, staging_table.name)
+        swap_tables(connection, staging_table.name, final_table_name)
+        refresh_summaries(connection, dates)
+        step.rows_out = rows
+
+def read_final_frame(updated_timestamp):
+    """Load both source tables into pandas and combine them in the final table's shape."""
+    with span('read') as step:
+        # Fetched in parallel threads, each on its own pooled connection
+        transactions_ax_df, transactions_sage_df = run_concurrently([
+            lambda: read_source_table('Transactions_AX', transactions_ax_columns),
+            lambda: read_source_table('Transactions_Sage', transactions_sage_columns),
+        ])
+        step.rows_out = len(transactions_ax_df) + len(transactions_sage_df)
+
+    # Combine data from both tables
+    with span('transform') as step:
+        transactions_final_df = pd.concat([
+            finalize_frame(transactions_ax_df, transactions_ax_renames, updated_timestamp),
+            finalize_frame(transactions_sage_df, transactions_sage_renames, updated_timestamp),
+        ], ignore_index=True)
+        step.rows_in = len(transactions_ax_df) + len(transactions_sage_df)
+        step.rows_out = len(transactions_final_df)
+    return transactions_final_df
+
+def build_final_in_memory(updated_timestamp):
+    """Load both source tables into pandas, combine them and export the result.
+
+    Every month of the old and new table is logged as changed (no server-side diff here).
+    """
+    engine = get_engine(connection_string)
+    with engine.connect() as connection:
+        old_dates = table_dates(connection, final_table_name)
+    transactions_final_df = read_final_frame(updated_timestamp)
+
+    # Export the combined data to 'Transactions_Final' table
+    with span('export') as step:
+        export_to_sql(transactions_final_df, final_table_name, connection_string, if_exists='replace', dtype=final_columns)
+        with engine.begin() as connection:
+            refresh_summaries(connection, list(old_dates) + list(transactions_final_df['Date']), transactions_final_df)
+        step.rows_in = len(transactions_final_df)
+
+def build_final_incremental(engine, updated_timestamp):
+    """Insert new rows, replace changed ones and delete vanished ones; untouched rows keep their timestamp.
+
+    Rows are fingerprinted and matched to the previous load by change_detection.py.
+    A changed row is deleted and re-inserted under its old Row_Key with this
+    build's timestamp. The keys touched are written to Transactions_Final_Delta.
+    A final table without fingerprints (first build, or built in another mode)
+    is rebuilt in full and every row counts as inserted.
+    """
+    transactions_final_df = read_final_frame(updated_timestamp)
+    with span('fingerprint') as step:
+        transactions_final_df['Key_Hash'], transactions_final_df['Row_Hash'] = row_fingerprints(
+            transactions_final_df, row_key_columns, business_columns)
+        step.rows_in = len(transactions_final_df)
+
+    with span('export') as step, engine.begin() as connection:
+        # The lake copy mirrors the table, so it needs the timestamps of the rows left untouched
+        old = read_fingerprints(connection, ['Date', 'Updated_Timestamp'] if use_lake else ['Date'])
+        full_rebuild = old is None
+        if full_rebuild:
+            old_dates = table_dates(connection, final_table_name)
+            old = pd.DataFrame({name: pd.Series(dtype='int64') for name in fingerprint_columns})
+            old['Date'] = pd.Series(dtype='datetime64[ns]')
+
+        row_keys, changes = diff_fingerprints(old, transactions_final_df)
+        transactions_final_df['Row_Key'] = row_keys
+        if use_lake and not full_rebuild:
+            kept = ~(changes['inserted'] | changes['updated'])
+            positions = pd.Index(old['Row_Key'].to_numpy()).get_indexer(row_keys[kept])
+            transactions_final_df.loc[kept, 'Updated_Timestamp'] = old['Updated_Timestamp'].to_numpy()[positions]
+        transactions_final_df = transactions_final_df[list(final_columns) + list(fingerprint_columns)]
+        delta = pd.concat([
+            transactions_final_df.loc[changes['inserted'], ['Row_Key', 'Date']].assign(Change_Type='insert'),
+            transactions_final_df.loc[changes['updated'], ['Row_Key', 'Date']].assign(Change_Type='update'),
+            old.loc[changes['deleted'], ['Row_Key', 'Date']].assign(Change_Type='delete'),
+        ], ignore_index=True)
+        delta['Updated_Timestamp'] = updated_timestamp
+        insert_frame(delta, delta_table_name, connection, if_exists='replace', dtype=delta_columns)
+
+        if full_rebuild:
+            staging_table = create_staging_table(connection, {**final_columns, **fingerprint_columns})
+            insert_frame(transactions_final_df, staging_table.name, connection, dtype={**final_columns, **fingerprint_columns})
+            swap_tables(connection, staging_table.name, final_table_name)
+            create_index(connection, final_table_name, ['Row_Key'])
+            dates = list(old_dates) + list(delta['Date'])
+        else:
+            # Replaced and vanished rows go first, then the new and changed rows are appended
+            final = sa.table(final_table_name, sa.column('Row_Key'))
+            removed = sa.table(delta_table_name, sa.column('Row_Key'), sa.column('Change_Type'))
+            connection.execute(sa.delete(final).where(final.c.Row_Key.in_(
+                sa.select(removed.c.Row_Key).where(removed.c.Change_Type.in_(['update', 'delete'])))))
+            insert_frame(transactions_final_df[changes['inserted'] | changes['updated']], final_table_name, connection,
+                         dtype={**final_columns, **fingerprint_columns})
+            dates = list(delta['Date'])
+
+        refresh_summaries(connection, dates, transactions_final_df)
+        counts = delta['Change_Type'].value_counts()
+        unchanged = len(transactions_final_df) - counts.get('insert', 0) - counts.get('update', 0)
+        print(f"{final_table_name}: {counts.get('insert', 0)} inserted, {counts.get('update', 0)} updated, "
+              f"{counts.get('delete', 0)} deleted, {unchanged} unchanged.")
+        step.rows_out = len(delta)
+
+# ==========================================
+# 6. Main Processing Logic
+# ==========================================
+@instrumented('Transactions_Final')
+def main():
+    engine = get_engine(connection_string)
+    updated_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    if build_mode == 'incremental':
+        build_final_incremental(engine, updated_timestamp)
+    elif build_mode == 'pushdown':
+        try:
+            build_final_pushdown(engine, updated_timestamp)
+        except sa.exc.DBAPIError as e:
+            print(f"Push-down build failed ({e.orig}); falling back to streaming.")
+            build_final_streaming(engine, updated_timestamp)
+    elif build_mode == 'streaming':
+        build_final_streaming(engine, updated_timestamp)
+    else:
+        build_final_in_memory(updated_timestamp)
+
+    print("Data has been exported to 'Transactions_Final' successfully.")
 
-print("Data has been exported to 'Transactions_Final' successfully.")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,19 +1,20 @@
-from urllib.parse import quote_plus
-from sqlalchemy import create_engine
 import pandas as pd
 from pathlib import Path
+from file_index import get_file_index
+from excel_ingest import read_sage_transactions, iter_sage_transactions, load_in_parallel, load_file
+from workbook_cache import WorkbookCache
+from mapping_engine import Lookup, MappingEngine
+import database
+from database import get_engine
+from schema import transactions_sage_schema, schema_version, apply_schema, sql_types
+from instrumentation import instrumented, span, file_bytes
+from incremental_load import source_hashes, dependency_hash, tag_source, plan_incremental_load, apply_incremental_load
 
 # ==========================================
-# 1. Credentials and connection details
+# 1. Connection details
 # ==========================================
-username = 'YOUR_USERNAME'
-password = quote_plus('YOUR_PASSWORD')  # URL encode the password
-hostname = 'your-server-name.database.windows.net'
-database_name = 'YourDatabaseName'
-driver = quote_plus('ODBC Driver 17 for SQL Server') 
-
-# Construct the connection string with URL encoding
-connection_string = f"mssql+pyodbc://{username}:{password}@{hostname}/{database_name}?driver={driver}"
+# Credentials live in database.py, shared by every script; assign another string here to point this one elsewhere
+connection_string = database.connection_string
 
 # ==========================================
 # 2. Configuration & File Setup
@@ -22,6 +23,9 @@ connection_string = f"mssql+pyodbc://{username}:{password}@{hostname}/{database_
 root_directory = r'C:\Users\YourUser\Path\To\Raw_Data\SAGE'
 mapping_file_path = Path(r'C:\Users\YourUser\Path\To\Supplier_Mapping\Mapping_Sage.xlsx')
 
+# Account -> Cost Center / Department rules that resolve NULL 'Department' entries (.csv, .xlsx or .json)
+account_overrides_path = Path(__file__).resolve().parents[1] / 'config' / 'sage_account_overrides.csv'
+
 transactions_file_names = [
     '1.Strike FS Jan 2024 Nominal Activity.xlsx',
     '2.Strike FS Feb 2024 Nominal Activity.xlsx',
@@ -53,84 +57,183 @@ transactions_file_names = [
     '14.Strike February 2025 Nominal Activity.xlsx'
 ]
 
+# Glob matched against file names to pick up every export without listing them,
+# e.g. '* Nominal Activity.xlsx'; when None the transactions_file_names list is used
+transactions_file_pattern = None
+
 sheet_name = 'Nominal Activity - Excluding N'
 
-# ==========================================
-# 3. Data Loading & Initial Cleaning
-# ==========================================
-# Read mapping data
-mapping_data = pd.read_excel(mapping_file_path, sheet_name='Sheet1')
-
-# Ensure 'Account' column is a string and trim spaces
-mapping_data['Account '] = mapping_data['Account '].astype(str).str.strip()
-mapping_data.drop(columns=['Account '], inplace=True)
-
-# Read data from both Excel files and concatenate them
-data_frames = []
-for file_name in transactions_file_names:
-    excel_file_path = Path(root_directory) / file_name
-    # Header starts at row 9 (header=8 in zero-indexed pandas)
-    data = pd.read_excel(excel_file_path, sheet_name=sheet_name, header=8)
-    
-    # Assign company name based on filename
-    company_name = 'Financial Services' if 'FS' in file_name else 'Strike'
-    data['Company'] = company_name
-    data_frames.append(data)
-
-combined_data = pd.concat(data_frames, ignore_index=True)
-
-# Filter out rows where the 'N/C:' column is NULL
-filtered_data = combined_data.dropna(subset=['N/C:'])
-
-# Select only the required columns
+# Columns kept from each Nominal Activity export
 required_columns = [
     'Company', 'N/C:', 'No', 'Type', 'Date', 'Account ', 
     'Ref', 'Details', 'T/C', 'Total', 'Supplier Name', 'Company/Account'
 ]
-filtered_data = filtered_data[required_columns]
 
-# Format the Date column
-if 'Date' in filtered_data.columns:
-    filtered_data['Date'] = pd.to_datetime(filtered_data['Date']).dt.strftime('%d/%m/%Y')
+# Number of processes used to parse the monthly exports (None = one per CPU, 1 = serial)
+max_workers = None
 
-# Rename 'Account ' for merging and clean strings
-filtered_data.rename(columns={'Account ': 'Account'}, inplace=True)
-filtered_data['Account'] = filtered_data['Account'].astype(str).str.strip()
-filtered_data['Company/Account'] = filtered_data['Company/Account'].astype(str).str.strip()
+# Serve unchanged workbooks from the local parsed-workbook cache instead of re-parsing them
+use_workbook_cache = True
 
-# ==========================================
-# 4. Merging & Special Mappings
-# ==========================================
-mapping_columns = ['Company/Account', 'Name', 'Level 1', 'Level 2', 'Level 3', 'Level 4', 'Cost Center', 'Department']
-merged_data = pd.merge(filtered_data, mapping_data[mapping_columns], on='Company/Account', how='left')
-
-# Specific mappings to resolve NULL 'Department' entries based on Account name
-additional_mappings = {
-    'ADP': {'Cost Center': 170, 'Department': 'Finance'},
-    'BIRKETTS': {'Cost Center': 170, 'Department': 'Finance'},
-    'ENJOY': {'Cost Center': 180, 'Department': 'People'},
-    'GIRAFFE': {'Cost Center': 250, 'Department': 'Partnerships'},
-    'GOTO': {'Cost Center': 250, 'Department': 'Partnerships'},
-    'HOUSE': {'Cost Center': 130, 'Department': 'Head Office (utilities & other)'},
-    'MAB': {'Cost Center': 130, 'Department': 'Head Office (utilities & other)'},
-    'OPTAMOR': {'Cost Center': 180, 'Department': 'People'},
-    'PPL': {'Cost Center': 130, 'Department': 'Head Office (utilities & other)'},
-    'PRATT': {'Cost Center': 180, 'Department': 'People'},
-    'RIGHT': {'Cost Center': 250, 'Department': 'Partnerships'},
-    'ZOHO': {'Cost Center': 202, 'Department': 'IT Ops'},
-}
-
-# Apply additional mappings only where Department is still null
-for account, update_values in additional_mappings.items():
-    condition = (merged_data['Account'] == account) & (merged_data['Department'].isnull())
-    merged_data.loc[condition, 'Cost Center'] = update_values['Cost Center']
-    merged_data.loc[condition, 'Department'] = update_values['Department']
+# 'incremental' reloads only the workbooks whose contents changed since the last run; 'replace' rewrites the table
+load_mode = 'incremental'
+
+# 'in_memory' reads every changed export before mapping and writing them; 'streaming' pushes each export
+# through filter, mapping, cleanup and the SQL insert in batches of stream_batch_size rows, so peak memory
+# is bounded by the batch size instead of the data volume (exports are read serially, bypassing the workbook cache)
+processing_mode = 'in_memory'
+stream_batch_size = 50000
+
+# Also keep the table as month-partitioned Parquet in the local lake (data_lake.py), where
+# Transactions_Final reads it instead of pulling the table back from the server
+use_lake = True
 
 # ==========================================
-# 5. SQL Export
+# 3. Data Loading & Initial Cleaning
 # ==========================================
-engine = create_engine(connection_string)
-table_name = 'Transactions_Sage'
-merged_data.to_sql(table_name, con=engine, if_exists='replace', index=False)
-
-print("Data has been successfully imported.")
\ No newline at end of file
+def find_transactions_files():
+    """Paths of the Nominal Activity exports to load."""
+    if transactions_file_pattern:
+        return get_file_index(root_directory).find(transactions_file_pattern)
+    return [Path(root_directory) / file_name for file_name in transactions_file_names]
+
+def input_files():
+    """Every workbook this stage reads, for the pipeline runner's up-to-date check."""
+    return find_transactions_files() + [mapping_file_path, account_overrides_path]
+
+def watch_directories():
+    """Directories where new or updated inputs of this stage land, for watch_folders.py."""
+    return [Path(root_directory), Path(mapping_file_path).parent, Path(account_overrides_path).parent]
+
+def read_mapping(file_path):
+    """Read the Sage mapping table (keyed on Company/Account)."""
+    # Company/Account is read as text, as the exports' join key is (schema.text_dtypes)
+    mapping_data = pd.read_excel(file_path, sheet_name='Sheet1', dtype={'Company/Account': str})
+
+    # Ensure 'Account' column is a string and trim spaces
+    mapping_data['Account '] = mapping_data['Account '].astype(str).str.strip()
+    mapping_data.drop(columns=['Account '], inplace=True)
+    return mapping_data
+
+def build_mapping_engine(mapping_data):
+    """Join the Sage mapping on Company/Account, then fill NULL 'Department' entries from the Account overrides."""
+    mapping_columns = ['Name', 'Level 1', 'Level 2', 'Level 3', 'Level 4', 'Cost Center', 'Department']
+    return MappingEngine([
+        Lookup('Mapping_Sage', mapping_data, key='Company/Account', columns=mapping_columns),
+        Lookup('Account overrides', account_overrides_path, key='Account', fill_missing='Department'),
+    ])
+
+def prepare_transactions(filtered_data):
+    """Rename 'Account ' for merging and clean the join keys."""
+    filtered_data = filtered_data.rename(columns={'Account ': 'Account'})
+    filtered_data['Account'] = filtered_data['Account'].astype(str).str.strip()
+    filtered_data['Company/Account'] = filtered_data['Company/Account'].astype(str).str.strip()
+    return filtered_data
+
+def stream_transactions(files_to_load, hashes, mapping_engine):
+    """Yield the mapped transactions of every export one bounded batch at a time."""
+    batches = (
+        prepare_transactions(tag_source(data, path, hashes[path.name]))
+        for path in files_to_load
+        for data in iter_sage_transactions(path, sheet_name, required_columns, schema=transactions_sage_schema,
+                                           batch_size=stream_batch_size)
+    )
+    for merged_data in mapping_engine.apply_batches(batches):
+        # Compact dtypes for the mapped columns (after the overrides, which add new Department values)
+        yield apply_schema(merged_data, transactions_sage_schema)
+
+@instrumented('Transactions_Sage')
+def main():
+    engine = get_engine(connection_string)
+    table_name = 'Transactions_Sage'
+
+    # Work out which exports changed since the last load (a mapping edit invalidates every export)
+    with span('discovery') as step:
+        transactions_file_paths = find_transactions_files()
+        step.rows_out = len(transactions_file_paths)
+    with span('plan') as step:
+        hashes = source_hashes(transactions_file_paths)
+        mapping_hash = dependency_hash([mapping_file_path, account_overrides_path], schema_version)
+        full_refresh = load_mode == 'replace'
+        changed, removed = plan_incremental_load(engine, table_name, hashes, mapping_hash, full_refresh, use_lake)
+        step.rows_in, step.rows_out = len(hashes), len(changed)
+    if not changed and not removed:
+        print(f"{table_name} is already up to date.")
+        return
+    files_to_load = [path for path in transactions_file_paths if path.name in changed]
+    cache = WorkbookCache() if use_workbook_cache else None
+
+    if processing_mode == 'streaming':
+        # Mappings are held in memory once; the exports never are
+        with span('read') as step:
+            mapping_engine = build_mapping_engine(load_file(read_mapping, mapping_file_path, cache=cache))
+            step.bytes_read = file_bytes([mapping_file_path])
+
+        # Filter, mapping, cleanup and the SQL insert all run inside this span, batch by batch
+        with span('stream') as step:
+            batches = stream_transactions(files_to_load, hashes, mapping_engine)
+            step.rows_in = apply_incremental_load(engine, table_name, batches, hashes, changed, removed, mapping_hash,
+                                                  full_refresh, dtype=sql_types(None, transactions_sage_schema),
+                                                  use_lake=use_lake)
+            step.bytes_read = file_bytes(files_to_load)
+        if cache is not None:
+            cache.report()
+        print("Data has been successfully imported.")
+        return
+
+    with span('read') as step:
+        # Read mapping data
+        mapping_data = load_file(read_mapping, mapping_file_path, cache=cache)
+
+        # Read, tag and filter every export in parallel worker processes, then concatenate them
+        # (each worker drops the rows with an empty N/C: from its parsed export, so the filter is timed here)
+        data_frames = load_in_parallel(
+            read_sage_transactions, files_to_load,
+            max_workers=max_workers, cache=cache, sheet_name=sheet_name, columns=required_columns,
+            schema=transactions_sage_schema
+        )
+        data_frames = [tag_source(data, path, hashes[path.name]) for data, path in zip(data_frames, files_to_load)]
+        if cache is not None:
+            cache.report()
+
+        if data_frames:
+            filtered_data = pd.concat(data_frames, ignore_index=True)
+        else:
+            # Only removed exports: nothing to insert, their partitions are just deleted
+            filtered_data = pd.DataFrame(columns=required_columns)
+        step.rows_out = len(filtered_data)
+        step.bytes_read = file_bytes(files_to_load + [mapping_file_path])
+
+    with span('transform') as step:
+        # Convert Date and the other exported columns to their compact dtypes
+        filtered_data = apply_schema(filtered_data, transactions_sage_schema)
+
+        # Rename 'Account ' for merging and clean strings
+        filtered_data = prepare_transactions(filtered_data)
+        step.rows_in = step.rows_out = len(filtered_data)
+
+    # ==========================================
+    # 4. Merging & Special Mappings
+    # ==========================================
+    # Join the Sage mapping on Company/Account, then fill NULL 'Department' entries from the Account overrides
+    with span('merge') as step:
+        mapping_engine = build_mapping_engine(mapping_data)
+        merged_data = mapping_engine.apply(filtered_data)
+        step.rows_in, step.rows_out = len(filtered_data), len(merged_data)
+
+    # ==========================================
+    # 5. SQL Export
+    # ==========================================
+    # Compact dtypes for the mapped columns (after the overrides, which add new Department values)
+    with span('transform') as step:
+        merged_data = apply_schema(merged_data, transactions_sage_schema)
+        step.rows_in = step.rows_out = len(merged_data)
+    with span('export') as step:
+        apply_incremental_load(engine, table_name, merged_data, hashes, changed, removed, mapping_hash, full_refresh,
+                               dtype=sql_types(merged_data, transactions_sage_schema), use_lake=use_lake)
+        step.rows_in = len(merged_data)
+
+    print("Data has been successfully imported.")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,71 @@
+import time
+import sqlalchemy as sa
+from database import get_engine, with_retry
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# Rows sent per batch; tune with benchmarks/bench_bulk_writer.py
+default_batch_size = 10000
+
+# ==========================================
+# 2. Helper Functions
+# ==========================================
+def insert_frame(df, table_name, connection, if_exists='append', batch_size=default_batch_size, dtype=None):
+    """Insert a DataFrame in batches on an open connection.
+
+    Each batch is one executemany of the INSERT, which each dialect runs its
+    own way: SQL Server sends it as pyodbc parameter arrays (fast_executemany,
+    set by database.create_engine), PostgreSQL as multi-row INSERT ... VALUES
+    statements built by SQLAlchemy, and SQLite or MySQL through the driver's
+    own executemany (SQLite re-executes the prepared statement row by row).
+    """
+    df.to_sql(table_name, con=connection, if_exists=if_exists, index=False, chunksize=batch_size, dtype=dtype)
+
+def swap_tables(connection, staging_name, table_name):
+    """Drop the target table and rename the staging table over it on an open transaction."""
+    preparer = connection.dialect.identifier_preparer
+    if sa.inspect(connection).has_table(table_name):
+        connection.execute(sa.text(f"DROP TABLE {preparer.quote(table_name)}"))
+    if connection.dialect.name == 'mssql':
+        connection.execute(sa.text(f"EXEC sp_rename '{staging_name}', '{table_name}'"))
+    else:
+        connection.execute(sa.text(f"ALTER TABLE {preparer.quote(staging_name)} RENAME TO {preparer.quote(table_name)}"))
+
+def create_index(connection, table_name, columns):
+    """Index a freshly replaced table (the staging swap does not carry indexes over)."""
+    table = sa.Table(table_name, sa.MetaData(), autoload_with=connection)
+    index_name = f"IX_{table_name}_{'_'.join(columns)}"
+    sa.Index(index_name, *(table.c[column] for column in columns)).create(connection, checkfirst=True)
+
+# ==========================================
+# 3. Bulk Writer
+# ==========================================
+def export_to_sql(df, table_name, sql_connection_string, if_exists='replace', batch_size=default_batch_size, dtype=None):
+    """Export DataFrame to a SQL table in batches.
+
+    With if_exists='replace' the rows are loaded into a staging table that is
+    then swapped over the target in one transaction, so readers never see a
+    half-loaded table. Indexes and grants on the old target are not carried over.
+    """
+    engine = get_engine(sql_connection_string)
+    start = time.perf_counter()
+
+    def load(target_name, mode):
+        with engine.begin() as connection:
+            insert_frame(df, target_name, connection, if_exists=mode, batch_size=batch_size, dtype=dtype)
+
+    if if_exists == 'replace':
+        # Reloading the staging table is safe to repeat, so a transient error retries it. The swap and plain
+        # appends are not: after a failed commit it is unclear whether their changes were already applied
+        staging_name = f"{table_name}_Staging"
+        with_retry(load, staging_name, 'replace')
+        with engine.begin() as connection:
+            swap_tables(connection, staging_name, table_name)
+    else:
+        load(table_name, if_exists)
+
+    elapsed = time.perf_counter() - start
+    rate = len(df) / elapsed if elapsed else 0
+    print(f"Data has been exported to the SQL table: {table_name} ({len(df)} rows, {rate:,.0f} rows/sec)")
+    return rate
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 1. Row Fingerprints
+# ==========================================
+def hash_columns(df, columns):
+    """One signed 64-bit hash per row of the given columns (vectorized; fits a BIGINT column)."""
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy().view(np.int64)
+
+def row_fingerprints(df, key_columns, value_columns):
+    """(Key_Hash, Row_Hash) of every row: the hash of its key columns and of all its value columns."""
+    return hash_columns(df, key_columns), hash_columns(df, value_columns)
+
+def occurrence(values):
+    """Position of each value among the equal values before it (0 for the first)."""
+    return pd.Series(values).groupby(values).cumcount().to_numpy()
+
+def pair_rows(old_values, new_values):
+    """Pair equal values one-to-one (the k-th occurrence in old with the k-th in new).
+
+    Returns the positions (in old, in new) of the paired rows.
+    """
+    old = pd.DataFrame({'value': old_values, 'n': occurrence(old_values), 'old': np.arange(len(old_values))})
+    new = pd.DataFrame({'value': new_values, 'n': occurrence(new_values), 'new': np.arange(len(new_values))})
+    pairs = new.merge(old, on=['value', 'n'])
+    return pairs['old'].to_numpy(), pairs['new'].to_numpy()
+
+def new_row_keys(row_hashes, taken):
+    """Row keys for inserted rows: derived from their hash, unique among themselves and the taken keys."""
+    # Writable copies: pandas hands out read-only views of its buffers
+    salt = occurrence(row_hashes).copy()
+    keys = hash_columns(pd.DataFrame({'hash': row_hashes, 'salt': salt}), ['hash', 'salt']).copy()
+    # A clash needs a 64-bit collision or a re-used key of a since-changed row; rehash those few
+    clash = np.isin(keys, taken) | pd.Series(keys).duplicated().to_numpy()
+    while clash.any():
+        salt[clash] += len(row_hashes) + 1
+        keys[clash] = hash_columns(pd.DataFrame({'hash': row_hashes[clash], 'salt': salt[clash]}), ['hash', 'salt'])
+        clash = np.isin(keys, taken) | pd.Series(keys).duplicated().to_numpy()
+    return keys
+
+# ==========================================
+# 2. Diff
+# ==========================================
+def diff_fingerprints(old, new):
+    """Match the rows of a new load (Key_Hash, Row_Hash) to the previous one (Row_Key, Key_Hash, Row_Hash).
+
+    Identical rows are paired first and keep their Row_Key; the rest are
+    paired on Key_Hash and count as updated (taking the old Row_Key).
+    Returns the Row_Key of every new row and boolean masks 'inserted' and
+    'updated' over the rows of new and 'deleted' over the rows of old.
+    """
+    old_row_keys = old['Row_Key'].to_numpy(dtype=np.int64)
+    row_keys = np.zeros(len(new), dtype=np.int64)
+    old_left = np.ones(len(old), dtype=bool)
+    new_left = np.ones(len(new), dtype=bool)
+
+    old_same, new_same = pair_rows(old['Row_Hash'].to_numpy(), new['Row_Hash'].to_numpy())
+    row_keys[new_same] = old_row_keys[old_same]
+    old_left[old_same] = new_left[new_same] = False
+
+    old_rest, new_rest = np.flatnonzero(old_left), np.flatnonzero(new_left)
+    old_changed, new_changed = pair_rows(old['Key_Hash'].to_numpy()[old_rest], new['Key_Hash'].to_numpy()[new_rest])
+    old_changed, new_changed = old_rest[old_changed], new_rest[new_changed]
+    row_keys[new_changed] = old_row_keys[old_changed]
+    old_left[old_changed] = new_left[new_changed] = False
+    updated = np.zeros(len(new), dtype=bool)
+    updated[new_changed] = True
+
+    row_keys[new_left] = new_row_keys(new['Row_Hash'].to_numpy()[new_left], row_keys[~new_left])
+    return row_keys, {'inserted': new_left, 'updated': updated, 'deleted': old_left}
@@ -0,0 +1,71 @@
+import pandas as pd
+import sqlalchemy as sa
+from datetime import datetime
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# Months whose rows changed in each load, so dependent tables (e.g. Actual_vs_Forecast) refresh only those
+change_log_table_name = 'ETL_Change_Log'
+
+change_log_table = sa.Table(
+    change_log_table_name, sa.MetaData(),
+    sa.Column('Change_Id', sa.Integer, primary_key=True, autoincrement=True),
+    sa.Column('Table_Name', sa.String(255)),
+    sa.Column('Period', sa.Date),
+    sa.Column('Changed_At', sa.DateTime),
+)
+
+# ==========================================
+# 2. Helper Functions
+# ==========================================
+def month_starts(dates):
+    """Sorted distinct first-of-month dates of a collection of dates (datetimes or ISO text)."""
+    dates = pd.to_datetime(pd.Series(list(dates), dtype=object), errors='coerce', format='ISO8601').dropna()
+    return sorted(set(dates.dt.to_period('M').dt.start_time.dt.date))
+
+def month_filter(column, periods):
+    """WHERE clause selecting the given months of a date column, with consecutive months merged into one range."""
+    ranges = []
+    for period in sorted(periods):
+        period = pd.Timestamp(period)
+        if ranges and ranges[-1][1] == period:
+            ranges[-1][1] = period + pd.DateOffset(months=1)
+        else:
+            ranges.append([period, period + pd.DateOffset(months=1)])
+    return sa.or_(*[sa.and_(column >= start.date(), column < end.date()) for start, end in ranges])
+
+# ==========================================
+# 3. Change Log
+# ==========================================
+def record_changed_periods(connection, table_name, dates):
+    """Log the months of the given dates as changed in table_name; returns those months."""
+    periods = month_starts(dates)
+    change_log_table.create(connection, checkfirst=True)
+    if periods:
+        changed_at = datetime.now()
+        connection.execute(change_log_table.insert(), [
+            {'Table_Name': table_name, 'Period': period, 'Changed_At': changed_at} for period in periods
+        ])
+    print(f"{table_name}: {len(periods)} month(s) changed.")
+    return periods
+
+def read_changes(connection, table_names, after_change_id=0):
+    """Months logged as changed in any of table_names after a change id, and the last change id seen."""
+    if not sa.inspect(connection).has_table(change_log_table_name):
+        return [], after_change_id
+    query = (
+        sa.select(change_log_table.c.Change_Id, change_log_table.c.Period)
+        .where(change_log_table.c.Table_Name.in_(table_names))
+        .where(change_log_table.c.Change_Id > after_change_id)
+    )
+    rows = connection.execute(query).all()
+    last_change_id = max([after_change_id] + [row.Change_Id for row in rows])
+    return month_starts(row.Period for row in rows), last_change_id
+
+def last_change_id(connection, table_names):
+    """Id of the last change logged for any of table_names (0 when none)."""
+    if not sa.inspect(connection).has_table(change_log_table_name):
+        return 0
+    query = sa.select(sa.func.max(change_log_table.c.Change_Id)).where(change_log_table.c.Table_Name.in_(table_names))
+    return connection.execute(query).scalar() or 0
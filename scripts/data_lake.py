@@ -0,0 +1,175 @@
+import os
+import re
+import sys
+import json
+import shutil
+import argparse
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pyarrow.fs as pafs
+from pathlib import Path
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# Root of the local Parquet lake: one directory per table, one Period=YYYY-MM directory per month.
+# Set FINANCE_ETL_LAKE to keep it somewhere else (e.g. a scratch disk or a benchmark's temp dir)
+lake_directory = Path(os.environ.get('FINANCE_ETL_LAKE') or Path.home() / '.finance_etl' / 'lake')
+
+# Partition of rows without a Date
+undated_period = 'none'
+
+# Per-table record of what the lake copy holds, compared with the SQL side before it is trusted
+state_file_name = '_state.json'
+
+# ==========================================
+# 2. Layout & State
+# ==========================================
+def table_directory(table_name, directory=None):
+    return Path(directory or lake_directory) / table_name
+
+def period_label(period):
+    """Partition name of a month ('2024-01')."""
+    return f"{pd.Timestamp(period):%Y-%m}"
+
+def month_labels(dates):
+    """Partition name of each row's month."""
+    return pd.to_datetime(pd.Series(dates)).dt.strftime('%Y-%m').fillna(undated_period)
+
+def source_stem(source_file):
+    return re.sub(r'[^A-Za-z0-9._ -]+', '_', Path(source_file).stem)
+
+def source_part(source_file, batch=0):
+    """File name of one batch of a source workbook's rows, within each month it covers."""
+    return f"{source_stem(source_file)}-{batch}"
+
+def has_table(table_name, directory=None):
+    return (table_directory(table_name, directory) / state_file_name).exists()
+
+def read_state(table_name, directory=None):
+    """The state recorded with the lake copy of a table, or None when the lake has no (complete) copy."""
+    try:
+        with open(table_directory(table_name, directory) / state_file_name) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_state(table_name, state, directory=None):
+    path = table_directory(table_name, directory) / state_file_name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix('.tmp')
+    with open(temp_path, 'w') as f:
+        json.dump(state, f, indent=1, default=str)
+    os.replace(temp_path, path)
+
+# ==========================================
+# 3. Writing
+# ==========================================
+def drop_table(table_name, directory=None):
+    shutil.rmtree(table_directory(table_name, directory), ignore_errors=True)
+
+def invalidate(table_name, directory=None):
+    """Mark the lake copy as incomplete until its next full write, so readers fall back to SQL."""
+    (table_directory(table_name, directory) / state_file_name).unlink(missing_ok=True)
+
+def storable(df):
+    """Store mixed-type columns (e.g. numeric and text account codes) as text, as the SQL tables do."""
+    for column in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[column], skipna=True).startswith('mixed'):
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+    return df
+
+def write_partitions(df, table_name, part='part', replace_periods=None, directory=None):
+    """Write df as one Parquet file per month under Period=YYYY-MM/<part>.parquet.
+
+    replace_periods lists months whose existing files are removed first (also when
+    df has no rows left in them). Returns the months written.
+    """
+    root = table_directory(table_name, directory)
+    for period in replace_periods or []:
+        shutil.rmtree(root / f"Period={period_label(period)}", ignore_errors=True)
+    if df.empty:
+        return []
+    labels = month_labels(df['Date'])
+    written = []
+    for label, rows in df.groupby(labels.to_numpy(), sort=True):
+        path = root / f"Period={label}" / f"{part}.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix('.tmp')
+        storable(rows).to_parquet(temp_path, index=False)
+        os.replace(temp_path, path)
+        written.append(label)
+    return written
+
+def remove_parts(table_name, source_files, directory=None):
+    """Delete every month's files of the given source workbooks."""
+    root = table_directory(table_name, directory)
+    patterns = [re.compile(re.escape(source_stem(source_file)) + r'-\d+\.parquet') for source_file in source_files]
+    for path in root.glob('Period=*/*.parquet'):
+        if any(pattern.fullmatch(path.name) for pattern in patterns):
+            path.unlink()
+
+# ==========================================
+# 4. Reading
+# ==========================================
+def read_table(table_name, columns=None, periods=None, directory=None):
+    """Read a lake table into pandas.
+
+    Only the requested columns are decoded (projection) and only the Period
+    directories of the requested months are opened (partition pruning). Files
+    are memory-mapped and Arrow buffers are handed to pandas block by block,
+    released as they are converted, so no second full copy is held.
+    """
+    root = table_directory(table_name, directory)
+    if periods is None:
+        files = sorted(root.glob('Period=*/*.parquet'))
+    else:
+        files = sorted(path for period in periods for path in (root / f"Period={period_label(period)}").glob('*.parquet'))
+    if not files:
+        return pd.DataFrame(columns=columns)
+
+    # Files written by different loads can type a column differently (e.g. all-null in one month)
+    schema = pa.unify_schemas([pq.read_schema(path, memory_map=True) for path in files], promote_options='permissive')
+    filesystem = pafs.LocalFileSystem(use_mmap=True)
+    dataset = ds.dataset([str(path) for path in files], schema=schema, format='parquet', filesystem=filesystem)
+    table = dataset.to_table(columns=[column for column in columns if column in schema.names] if columns else None)
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    for column in columns or []:
+        if column not in df.columns:
+            df[column] = None
+    return df[columns] if columns else df
+
+def table_summary(table_name, directory=None):
+    """(months, files, bytes) of a lake table."""
+    files = list(table_directory(table_name, directory).glob('Period=*/*.parquet'))
+    return len({path.parent.name for path in files}), len(files), sum(path.stat().st_size for path in files)
+
+# ==========================================
+# 5. Command line
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or purge the local Parquet lake.")
+    parser.add_argument('--lake-directory', default=None, help="Lake location (defaults to ~/.finance_etl/lake)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('info', help="Show the tables with their months, files and size")
+    purge_parser = commands.add_parser('purge', help="Delete tables from the lake (the next runs rewrite them)")
+    purge_parser.add_argument('tables', nargs='*', help="Tables to delete (default every table)")
+    args = parser.parse_args(argv)
+
+    root = Path(args.lake_directory or lake_directory)
+    tables = sorted(path.name for path in root.iterdir() if path.is_dir()) if root.exists() else []
+    if args.command == 'info':
+        print(f"Location: {root}")
+        for table_name in tables:
+            months, files, size = table_summary(table_name, root)
+            status = '' if has_table(table_name, root) else '  (incomplete)'
+            print(f"{table_name:<40} {months:>4} months {files:>6} files {size / 1024 ** 2:10.1f} MB{status}")
+    elif args.command == 'purge':
+        for table_name in args.tables or tables:
+            drop_table(table_name, root)
+        print(f"Removed {len(args.tables or tables)} table(s) from the lake.")
+
+if __name__ == '__main__':
+    sys.exit(main())
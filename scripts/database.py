@@ -0,0 +1,197 @@
+import os
+import time
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus
+import pandas as pd
+import sqlalchemy as sa
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from instrumentation import current_stage, write_record
+
+# ==========================================
+# 1. Credentials and connection details
+# ==========================================
+# Shared by every script; set FINANCE_ETL_CONNECTION_STRING to point them all elsewhere (e.g. a local SQLite file)
+username = 'YOUR_USERNAME'
+password = quote_plus('YOUR_PASSWORD') # URL encode the password
+hostname = 'your-server-name.database.windows.net'
+database_name = 'Finance'
+driver = quote_plus('ODBC Driver 17 for SQL Server') # URL encode the driver name
+
+# Construct the connection string with URL encoding
+connection_string = (os.environ.get('FINANCE_ETL_CONNECTION_STRING')
+                     or f"mssql+pyodbc://{username}:{password}@{hostname}/{database_name}?driver={driver}")
+
+# ==========================================
+# 2. Configuration
+# ==========================================
+# Connections each engine keeps open, and extra ones it may open under load; read when an engine is built
+pool_size = 5
+max_overflow = 5
+
+# Seconds to wait for a free connection before failing, and age after which a pooled connection is reopened
+# (Azure SQL drops idle sessions after 30 minutes)
+pool_timeout = 30
+pool_recycle = 1800
+
+# Attempts of an operation that failed on a transient error (dropped connection, pool timeout, deadlock),
+# waiting retry_backoff_seconds, then twice that, ... between attempts
+retry_attempts = 3
+retry_backoff_seconds = 1.0
+
+# Threads used by run_concurrently (e.g. Transactions_Final reading AX and Sage)
+read_workers = 4
+
+# Latency samples kept per stage and kind, for the percentiles
+metric_samples = 10000
+
+# ==========================================
+# 3. Latency Metrics
+# ==========================================
+# (stage, kind) -> deque of seconds, kind being 'acquire' (wait for a pooled connection) or 'query'
+latencies = {}
+latencies_lock = threading.Lock()
+
+def record_latency(kind, seconds):
+    key = (current_stage.get(), kind)
+    with latencies_lock:
+        if key not in latencies:
+            latencies[key] = deque(maxlen=metric_samples)
+        latencies[key].append(seconds)
+
+def latency_summary(stage=None):
+    """{(stage, kind): {'count', 'total_seconds', 'p50_ms', 'p95_ms', 'max_ms'}}, optionally for one stage."""
+    with latencies_lock:
+        samples = {key: list(values) for key, values in latencies.items() if stage is None or key[0] == stage}
+    summary = {}
+    for key, values in samples.items():
+        values.sort()
+        summary[key] = {
+            'count': len(values), 'total_seconds': round(sum(values), 4),
+            'p50_ms': round(values[len(values) // 2] * 1000, 2),
+            'p95_ms': round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 2),
+            'max_ms': round(values[-1] * 1000, 2),
+        }
+    return summary
+
+def reset_metrics():
+    with latencies_lock:
+        latencies.clear()
+
+def report_metrics(stage=None):
+    """Print the latency summary and append it to the run log."""
+    summary = latency_summary(stage)
+    if not summary:
+        return
+    print(f"{'stage':<22}{'kind':<9}{'count':>7}{'total s':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    for (stage_name, kind), stats in sorted(summary.items(), key=lambda item: (str(item[0][0]), item[0][1])):
+        print(f"{stage_name or '(no stage)':<22}{kind:<9}{stats['count']:>7}{stats['total_seconds']:>9.2f}"
+              f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['max_ms']:>9.1f}")
+        write_record({'stage': stage_name, 'span': f'database_{kind}', **stats})
+
+class TimedPool:
+    """Mixin timing every checkout, including the wait for a free connection and any reconnect."""
+
+    def connect(self):
+        start = time.perf_counter()
+        connection = super().connect()
+        record_latency('acquire', time.perf_counter() - start)
+        return connection
+
+def timed_pool_class(url):
+    """The dialect's default pool class with checkout timing."""
+    base = url.get_dialect().get_pool_class(url)
+    return type(f"Timed{base.__name__}", (TimedPool, base), {})
+
+def before_execute(connection, cursor, statement, parameters, context, executemany):
+    context.query_start = time.perf_counter()
+
+def after_execute(connection, cursor, statement, parameters, context, executemany):
+    record_latency('query', time.perf_counter() - context.query_start)
+
+# ==========================================
+# 4. Engines
+# ==========================================
+# Engines built so far, keyed by connection string (stages running in threads share them)
+engines = {}
+engines_lock = threading.Lock()
+
+def create_engine(sql_connection_string):
+    """A pooled engine with the latency hooks, using pyodbc's fast batch path for SQL Server."""
+    url = make_url(sql_connection_string)
+    poolclass = timed_pool_class(url)
+    # Check connections on checkout, so one dropped while idle is replaced instead of failing the next query
+    options = {'poolclass': poolclass, 'pool_pre_ping': True}
+    if issubclass(poolclass, QueuePool):
+        options.update(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout,
+                       pool_recycle=pool_recycle)
+    if url.drivername == 'mssql+pyodbc':
+        options['fast_executemany'] = True
+    engine = sa.create_engine(url, **options)
+    sa.event.listen(engine, 'before_cursor_execute', before_execute)
+    sa.event.listen(engine, 'after_cursor_execute', after_execute)
+    return engine
+
+def get_engine(sql_connection_string=None):
+    """Return the process-wide engine for the connection string (default: the shared connection_string)."""
+    sql_connection_string = sql_connection_string or connection_string
+    with engines_lock:
+        if sql_connection_string not in engines:
+            engines[sql_connection_string] = create_engine(sql_connection_string)
+        return engines[sql_connection_string]
+
+def dispose_engines():
+    """Close every pooled connection (e.g. before deleting a SQLite file)."""
+    with engines_lock:
+        for engine in engines.values():
+            engine.dispose()
+        engines.clear()
+
+# ==========================================
+# 5. Retries & Concurrent Reads
+# ==========================================
+# SQLSTATEs of SQL Server errors worth retrying: communication link failure, connection failures, deadlock victim
+transient_sqlstates = ('08S01', '08001', '08004', '40001', 'HYT00')
+
+def is_transient(error):
+    """Whether an error is a dropped connection, pool timeout or deadlock that a retry may get past."""
+    if isinstance(error, (sa.exc.DisconnectionError, sa.exc.TimeoutError)):
+        return True
+    if isinstance(error, sa.exc.DBAPIError):
+        if error.connection_invalidated:
+            return True
+        arguments = getattr(error.orig, 'args', ())
+        return bool(arguments) and str(arguments[0]) in transient_sqlstates
+    return False
+
+def with_retry(function, *args, **kwargs):
+    """Call function, retrying it with exponential backoff while it fails on a transient error.
+
+    Only for work that is safe to repeat: reads, and writes done in a
+    single transaction that a failure rolls back.
+    """
+    for attempt in range(retry_attempts):
+        try:
+            return function(*args, **kwargs)
+        except Exception as e:
+            if attempt == retry_attempts - 1 or not is_transient(e):
+                raise
+            delay = retry_backoff_seconds * 2 ** attempt
+            print(f"Transient database error ({type(e).__name__}), retrying in {delay:.1f}s: {str(e).splitlines()[0]}")
+            time.sleep(delay)
+
+def read_sql(query, sql_connection_string=None, **kwargs):
+    """pd.read_sql on the shared engine, retried on transient errors."""
+    return with_retry(lambda: pd.read_sql(query, con=get_engine(sql_connection_string), **kwargs))
+
+def run_concurrently(functions, max_workers=read_workers):
+    """Call each zero-argument function in its own thread (the engine's pool serves them); results in order.
+
+    Each thread runs in a copy of the caller's context, so its metrics and spans are attributed to the caller's stage.
+    """
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(functions)) or 1) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, function) for function in functions]
+        return [future.result() for future in futures]
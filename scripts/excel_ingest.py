@@ -0,0 +1,212 @@
+import os
+import numpy as np
+import pandas as pd
+import openpyxl
+from pandas.io.parsers import TextParser
+from schema import apply_schema, text_dtypes
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+# ==========================================
+# 1. Readers
+# ==========================================
+# Rows per batch read from a sheet, and per DataFrame yielded by iter_excel_batches (streaming mode)
+default_batch_size = 50000
+
+# Excel error values, which pandas reads as missing
+excel_error_values = {'#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A', '#GETTING_DATA'}
+
+def convert_cell(value):
+    """Convert an openpyxl cell value the same way pd.read_excel does."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        as_int = int(value)
+        return as_int if as_int == value else value
+    if isinstance(value, str) and value in excel_error_values:
+        return np.nan
+    return value
+
+def iter_excel_rows(file_path, sheet_name, header_row, columns, batch_size=default_batch_size):
+    """Stream the requested columns of a sheet as (names, rows) batches of converted cell values.
+
+    The workbook is opened in openpyxl's read-only mode and the header row
+    (1-based) is resolved first, so only the needed cells are converted and
+    at most batch_size rows are held at a time. Columns missing from the
+    sheet are skipped. Always yields at least one (possibly empty) batch.
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook[sheet_name]
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(min_row=header_row, values_only=True)
+        header = [convert_cell(value) for value in next(rows, ())]
+
+        # Resolve the header once: position of the first cell carrying each wanted name
+        positions = {}
+        for position, name in enumerate(header):
+            if name in columns and name not in positions:
+                positions[name] = position
+        names = list(positions)
+        positions = list(positions.values())
+
+        batch, blank_rows, yielded = [], [], False
+        for row in rows:
+            values = [convert_cell(row[i]) if i < len(row) else "" for i in positions]
+            if all(value is None for value in row):
+                # Blank rows are kept only if data follows, as pd.read_excel trims trailing blanks
+                blank_rows.append(values)
+                continue
+            batch.extend(blank_rows)
+            blank_rows = []
+            batch.append(values)
+            if len(batch) >= batch_size:
+                yield names, batch
+                batch, yielded = [], True
+        if batch or not yielded:
+            yield names, batch
+    finally:
+        workbook.close()
+
+def parse_rows(names, rows, dtype=None):
+    """Type converted cell values the way pd.read_excel does (it runs the same TextParser).
+
+    dtype maps column names to types that are applied instead of inferred (e.g. str for identifier codes).
+    """
+    if not names:
+        return pd.DataFrame()
+    return TextParser([names] + rows, header=0, skip_blank_lines=False, dtype=dtype).read()
+
+def iter_excel_batches(file_path, sheet_name, header_row, columns, batch_size=default_batch_size, dtype=None):
+    """Stream the requested columns of a sheet as DataFrame batches of at most batch_size rows.
+
+    Types are inferred batch by batch, so a column can come back typed
+    differently in two batches (e.g. '00123' read as 123 in a batch without
+    text codes). Columns given in dtype are typed alike in every batch; the
+    streaming readers pass the schema's text columns that way.
+    """
+    for names, rows in iter_excel_rows(file_path, sheet_name, header_row, columns, batch_size):
+        yield parse_rows(names, rows, dtype)
+
+def read_excel_sheet(file_path, sheet_name, header_row, columns, batch_size=default_batch_size, dtype=None):
+    """Read the requested columns of a sheet, typed as pd.read_excel would type them.
+
+    The rows are collected first and parsed in one go, so every column's type
+    is inferred from all of its values (columns given in dtype are not inferred).
+    """
+    names, rows = [], []
+    for names, batch in iter_excel_rows(file_path, sheet_name, header_row, columns, batch_size):
+        rows.extend(batch)
+    return parse_rows(names, rows, dtype)
+
+def read_excel_data(file_path, sheet_name, start_row, columns):
+    """Read specific data from an Excel file."""
+    df = read_excel_sheet(file_path, sheet_name, start_row, columns)
+
+    # Select only the required columns that actually exist in the file
+    existing_cols = [c for c in columns if c in df.columns]
+    df = df[existing_cols]
+
+    # Format the date column if it exists
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%d/%m/%Y')
+    return df
+
+# ==========================================
+# 2. Per-file workers (run inside the process pool)
+# ==========================================
+def iter_ax_transactions(file_path, columns, schema=None, batch_size=default_batch_size):
+    """Stream one AX export as filtered batches of at most batch_size rows.
+
+    With a schema, its text columns are read as strings and the others converted
+    to their compact dtypes batch by batch; otherwise Date is formatted as a
+    dd/mm/yyyy string.
+    """
+    for df in iter_excel_batches(file_path, 'Sheet1', 1, columns, batch_size, text_dtypes(schema)):
+        yield filter_ax_transactions(df, schema)
+
+def filter_ax_transactions(df, schema=None):
+    """Type (or format the Date of) AX rows and keep the ones the pipeline loads."""
+    if schema is not None:
+        df = apply_schema(df, schema)
+    elif 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%d/%m/%Y')
+    # Filter: Supplier Required is True and Ledger Code > 5
+    return df[(df['Supplier Required'] == True) & (df['Ledger Code'] > 5)]
+
+def read_ax_transactions(file_path, columns, schema=None):
+    """Read one AX export and keep only the rows the pipeline loads."""
+    df = read_excel_sheet(file_path, 'Sheet1', 1, columns, dtype=text_dtypes(schema))
+    df = filter_ax_transactions(df, schema)
+    return df[[c for c in columns if c in df.columns]]
+
+def company_name(file_path):
+    """Company of a Sage export, from its file name."""
+    return 'Financial Services' if 'FS' in Path(file_path).name else 'Strike'
+
+def iter_sage_transactions(file_path, sheet_name, columns, header=8, schema=None, batch_size=default_batch_size):
+    """Stream one Sage Nominal Activity export as tagged batches without the empty N/C: rows."""
+    # Header starts at row 9 (header=8 in zero-indexed pandas); filter out rows where 'N/C:' is NULL
+    for data in iter_excel_batches(file_path, sheet_name, header + 1, columns, batch_size, text_dtypes(schema)):
+        data = data.dropna(subset=['N/C:'])
+        data['Company'] = company_name(file_path)
+        data = data[columns]
+        yield apply_schema(data, schema) if schema is not None else data
+
+def read_sage_transactions(file_path, sheet_name, columns, header=8, schema=None):
+    """Read one Sage Nominal Activity export, tag its company and drop empty N/C: rows."""
+    data = read_excel_sheet(file_path, sheet_name, header + 1, columns, dtype=text_dtypes(schema))
+    data = data.dropna(subset=['N/C:'])
+
+    # Assign company name based on filename and keep the required columns
+    data['Company'] = company_name(file_path)
+    data = data[columns]
+    return apply_schema(data, schema) if schema is not None else data
+
+# ==========================================
+# 3. Pool
+# ==========================================
+def load_in_parallel(worker, file_paths, max_workers=None, cache=None, file_kwargs=None, **worker_kwargs):
+    """Run worker over every file in a process pool, returning results in input order.
+
+    max_workers=None uses one process per CPU; max_workers=1 runs serially in-process.
+    When a WorkbookCache is given, unchanged files are served from it and only misses are parsed.
+    file_kwargs optionally gives extra arguments per file (e.g. each workbook's sheet name).
+    """
+    file_paths = list(file_paths)
+    results = [None] * len(file_paths)
+    kwargs = [{**worker_kwargs, **extra} for extra in (file_kwargs or [{}] * len(file_paths))]
+
+    # Look up every file in the cache first so only misses are sent to the pool
+    keys = {}
+    pending = []
+    for i, path in enumerate(file_paths):
+        if cache is not None:
+            keys[i] = cache.key(worker, path, **kwargs[i])
+            results[i] = cache.get(keys[i])
+        if results[i] is None:
+            pending.append(i)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(pending))
+
+    if max_workers <= 1:
+        frames = [worker(file_paths[i], **kwargs[i]) for i in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(worker, file_paths[i], **kwargs[i]) for i in pending]
+            frames = [future.result() for future in futures]
+
+    for i, df in zip(pending, frames):
+        results[i] = df
+        if cache is not None:
+            cache.put(keys[i], df)
+
+    return results
+
+def load_file(reader, file_path, cache=None, **reader_kwargs):
+    """Read a single file in-process, through the cache when one is given."""
+    if cache is None:
+        return reader(file_path, **reader_kwargs)
+    return cache.load(reader, file_path, **reader_kwargs)
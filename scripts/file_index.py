@@ -0,0 +1,141 @@
+import os
+import re
+import json
+import glob
+import fnmatch
+import hashlib
+from pathlib import Path
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# Where directory listings are persisted between runs (set to None to always walk from scratch)
+default_index_directory = Path.home() / '.finance_etl' / 'file_index'
+
+# Indexes built in this process, keyed by root directory
+indexes = {}
+
+# Excel lock files ('~$...') and hidden or temporary files are never inputs, so lookups skip them
+ignored_prefixes = ('~$', '.')
+ignored_suffixes = ('.tmp', '.crdownload', '.part')
+
+# ==========================================
+# 2. File Index
+# ==========================================
+def is_ignored(name):
+    return name.startswith(ignored_prefixes) or name.lower().endswith(ignored_suffixes)
+
+class FileIndex:
+    """Name -> path index over every file below a root directory, built from a single walk.
+
+    When persisted, later runs only re-list directories whose mtime changed.
+    """
+
+    def __init__(self, root_directory, index_path=None):
+        self.root_directory = str(Path(root_directory))
+        self.index_path = Path(index_path) if index_path else None
+        self.directories = {}
+        self.rescanned = 0
+
+        if self.load():
+            self.refresh()
+        else:
+            self.refresh(full=True)
+        self.build_name_map()
+        self.save()
+
+    def scan_directory(self, directory):
+        """List one directory level."""
+        files, subdirectories = [], []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.name)
+                elif entry.is_file():
+                    files.append(entry.name)
+        self.rescanned += 1
+        return {'mtime': os.stat(directory).st_mtime_ns, 'files': files, 'subdirectories': subdirectories}
+
+    def refresh(self, full=False):
+        """Walk the tree, re-listing only directories that are new or whose mtime changed."""
+        refreshed = {}
+        pending = [self.root_directory]
+        while pending:
+            directory = pending.pop()
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            listing = None if full else self.directories.get(directory)
+            if listing is None or listing['mtime'] != mtime:
+                listing = self.scan_directory(directory)
+            refreshed[directory] = listing
+            pending.extend(os.path.join(directory, name) for name in listing['subdirectories'])
+        self.directories = refreshed
+
+    def build_name_map(self):
+        self.names = {}
+        for directory, listing in self.directories.items():
+            for name in listing['files']:
+                if is_ignored(name):
+                    continue
+                self.names.setdefault(os.path.normcase(name), []).append(Path(directory) / name)
+
+    def find(self, pattern):
+        """Return every file whose name matches pattern (an exact name or a glob such as '* Nominal Activity.xlsx')."""
+        if not glob.has_magic(pattern):
+            return sorted(self.names.get(os.path.normcase(pattern), []))
+        return sorted(path for name, paths in self.names.items() if fnmatch.fnmatch(name, pattern) for path in paths)
+
+    def find_regex(self, pattern):
+        """Return every file whose full name matches the regular expression."""
+        regex = re.compile(pattern, re.IGNORECASE if os.name == 'nt' else 0)
+        return sorted(path for paths in self.names.values() for path in paths if regex.fullmatch(path.name))
+
+    def load(self):
+        if self.index_path is None or not self.index_path.exists():
+            return False
+        try:
+            stored = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return False
+        if stored.get('root') != self.root_directory:
+            return False
+        self.directories = stored['directories']
+        return True
+
+    def save(self):
+        if self.index_path is None:
+            return
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_suffix('.tmp')
+        temp_path.write_text(json.dumps({'root': self.root_directory, 'directories': self.directories}))
+        os.replace(temp_path, self.index_path)
+
+# ==========================================
+# 3. Helper Functions
+# ==========================================
+def get_file_index(base_dir, index_directory=default_index_directory):
+    """Return the index for base_dir, building (or refreshing) it at most once per process."""
+    key = str(Path(base_dir))
+    if key not in indexes:
+        index_path = None
+        if index_directory is not None:
+            index_path = Path(index_directory) / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+        indexes[key] = FileIndex(base_dir, index_path)
+    return indexes[key]
+
+def refresh_indexes():
+    """Re-list the changed directories of every index built in this process (for long-running processes)."""
+    for index in indexes.values():
+        index.refresh()
+        index.build_name_map()
+        index.save()
+
+def find_specific_excel_file(base_dir, file_name):
+    """Find a specific Excel file (or every file matching a glob pattern) in a designated directory."""
+    full_path = Path(base_dir)
+    excel_files = get_file_index(full_path).find(file_name)
+    print(f"Looking in: {full_path}")
+    print(f"Files found: {excel_files}")
+    return excel_files
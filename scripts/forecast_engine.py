@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+from schema import forecast_schema, apply_schema
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# Decimal places kept for forecast amounts (as the per-department scripts rounded them)
+forecast_precision = 2
+
+# Offset from a DataFrame row position to its Excel row number (header on row 1)
+excel_first_data_row = 2
+
+# Columns identifying a line in Forecast and Forecast_Lines
+line_key_columns = ['Department', 'Line']
+
+# ==========================================
+# 2. Period Detection
+# ==========================================
+def period_headers(columns):
+    """Parse every column header in one vectorized pass; returns the period of each date header (NaT otherwise).
+
+    Date cells (datetime headers) and ISO or dd/mm/yyyy text count as periods. Numeric
+    headers do not, so a column titled 15 is no longer mistaken for 01/01/1970.
+    """
+    headers = pd.Series(list(columns), dtype=object)
+    headers = headers.where(pd.to_numeric(headers, errors='coerce').isna())
+    periods = pd.to_datetime(headers, errors='coerce', format='ISO8601')
+    periods = periods.fillna(pd.to_datetime(headers.where(periods.isna()), errors='coerce', format='%d/%m/%Y'))
+    return pd.DatetimeIndex(periods).normalize()
+
+# ==========================================
+# 3. Workbook Reader
+# ==========================================
+def read_forecast_workbook(file_path, sheet_name, department):
+    """Read one department's wide forecast sheet.
+
+    Returns (lines, amounts): the descriptive columns of every line (keyed by
+    Department and Line, the line's Excel row number) and the long table of
+    Department, Line, Period and Amount with blank cells left out.
+    """
+    df = pd.read_excel(file_path, sheet_name=sheet_name)
+    periods = period_headers(df.columns)
+    is_period = ~periods.isna()
+    line_numbers = np.arange(len(df)) + excel_first_data_row
+
+    lines = df.loc[:, ~is_period]
+    # A sheet's own 'Department' or 'Line' column is kept alongside the keys under another name
+    lines.columns = [f"{column} (workbook)" if str(column) in line_key_columns else str(column) for column in lines.columns]
+    lines = lines.astype('string')
+    lines.insert(0, 'Line', line_numbers)
+    lines.insert(0, 'Department', department)
+
+    # Unpivot: one row per line and period, built straight from the value matrix
+    values = df.loc[:, is_period].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    amounts = pd.DataFrame({
+        'Department': department,
+        'Line': np.repeat(line_numbers, values.shape[1]),
+        'Period': np.tile(periods[is_period].to_numpy(), len(df)),
+        'Amount': values.ravel().round(forecast_precision),
+    })
+    amounts = amounts[amounts['Amount'].notna()].reset_index(drop=True)
+    return lines, amounts
+
+def wide_forecast(lines, amounts):
+    """Rebuild a department's wide table (dd/mm/yyyy headers) for reports still reading Forecast_<Department>."""
+    wide = amounts.pivot(index='Line', columns='Period', values='Amount')
+    wide.columns = wide.columns.strftime('%d/%m/%Y')
+    descriptive = lines.drop(columns=['Department']).set_index('Line')
+    descriptive = descriptive.rename(columns={f"{column} (workbook)": column for column in line_key_columns})
+    return descriptive.join(wide).reset_index(drop=True)
+
+# ==========================================
+# 4. Change Detection
+# ==========================================
+def changed_periods(connection, forecast, forecast_lines, forecast_table_name, forecast_lines_table_name):
+    """Periods whose amounts, or whose lines' descriptive columns, differ from the tables currently in SQL.
+
+    Every period is changed when either table does not exist yet or the descriptive columns were renamed.
+    """
+    inspector = sa.inspect(connection)
+    if not (inspector.has_table(forecast_table_name) and inspector.has_table(forecast_lines_table_name)):
+        return forecast['Period'].unique()
+    old_forecast = pd.read_sql(sa.select(sa.table(forecast_table_name, *[sa.column(c) for c in forecast.columns])), connection)
+    old_lines = pd.read_sql(sa.select(sa.text('*')).select_from(sa.table(forecast_lines_table_name)), connection)
+    if list(old_lines.columns) != list(forecast_lines.columns):
+        return pd.concat([old_forecast['Period'], forecast['Period']]).unique()
+
+    # Amounts added, removed or revalued
+    old_forecast = apply_schema(old_forecast, forecast_schema)
+    amounts = forecast.merge(old_forecast, on=['Department', 'Line', 'Period'], how='outer', suffixes=('', ' (old)'), indicator=True)
+    differs = (amounts['_merge'] != 'both') | (amounts['Amount'] != amounts['Amount (old)'])
+
+    # Every period of a line whose descriptive columns changed
+    as_text = lambda df: df.astype('string').astype({'Line': int})
+    lines = as_text(forecast_lines).merge(as_text(old_lines), how='outer', indicator=True)
+    changed_lines = lines.loc[lines['_merge'] != 'both', line_key_columns].drop_duplicates()
+    affected = amounts.merge(changed_lines, on=line_key_columns, how='left', indicator='_line')['_line'] == 'both'
+    return amounts.loc[differs | affected.to_numpy(), 'Period'].unique()
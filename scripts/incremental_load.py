@@ -0,0 +1,159 @@
+import hashlib
+import pandas as pd
+import sqlalchemy as sa
+from pathlib import Path
+from datetime import datetime
+from workbook_cache import file_content_hash
+from bulk_writer import insert_frame
+import data_lake
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# Table recording which source workbooks each target table was loaded from
+manifest_table_name = 'ETL_Load_Manifest'
+
+manifest_table = sa.table(
+    manifest_table_name,
+    sa.column('Table_Name'), sa.column('Source_File'), sa.column('Content_Hash'),
+    sa.column('Dependency_Hash'), sa.column('Row_Count'), sa.column('Loaded_At')
+)
+
+# ==========================================
+# 2. Helper Functions
+# ==========================================
+def source_hashes(file_paths):
+    """Map each workbook's file name to the hash of its contents."""
+    return {Path(path).name: file_content_hash(path) for path in file_paths}
+
+def dependency_hash(file_paths, extra=''):
+    """Combine the hashes of shared inputs (e.g. mapping files, schema version) that affect every partition."""
+    digest = hashlib.sha256(str(extra).encode())
+    for path in file_paths:
+        digest.update(file_content_hash(path).encode())
+    return digest.hexdigest()
+
+def tag_source(df, file_path, content_hash):
+    """Record the source workbook and its content hash on every row."""
+    return df.assign(Source_File=Path(file_path).name, Source_Hash=content_hash)
+
+def read_manifest(connection, table_name):
+    """Return {source file: (content hash, dependency hash)} for a target table."""
+    if not sa.inspect(connection).has_table(manifest_table_name):
+        return {}
+    query = sa.select(manifest_table.c.Source_File, manifest_table.c.Content_Hash, manifest_table.c.Dependency_Hash)
+    query = query.where(manifest_table.c.Table_Name == table_name)
+    return {row[0]: (row[1], row[2]) for row in connection.execute(query)}
+
+def read_lake_manifest(table_name):
+    """Return {source file: (content hash, dependency hash)} of the lake copy of a target table."""
+    state = data_lake.read_state(table_name) or {}
+    return {name: tuple(hashes) for name, hashes in state.get('sources', {}).items()}
+
+def lake_in_sync(connection, table_name):
+    """True when the lake copy of a table holds exactly the source workbooks loaded into SQL."""
+    loaded = read_manifest(connection, table_name)
+    return bool(loaded) and read_lake_manifest(table_name) == loaded
+
+# ==========================================
+# 3. Incremental Load
+# ==========================================
+def plan_incremental_load(engine, table_name, hashes, dependency='', full_refresh=False, use_lake=False):
+    """Compare the current sources against the manifest.
+
+    Returns (changed, removed): source files that must be (re)loaded and
+    files that were loaded before but are no longer part of the source list.
+    With use_lake, files missing from the lake copy of the table count as changed too.
+    """
+    if full_refresh:
+        return sorted(hashes), []
+
+    with engine.connect() as connection:
+        if not sa.inspect(connection).has_table(table_name):
+            return sorted(hashes), []
+        loaded = read_manifest(connection, table_name)
+
+    in_lake = read_lake_manifest(table_name) if use_lake else loaded
+    changed = sorted(name for name, content in hashes.items()
+                     if loaded.get(name) != (content, dependency) or in_lake.get(name) != (content, dependency))
+    removed = sorted(name for name in loaded if name not in hashes)
+    return changed, removed
+
+def apply_incremental_load(engine, table_name, df, hashes, changed, removed, dependency='', full_refresh=False, dtype=None,
+                           use_lake=False):
+    """Replace the changed source partitions of a table and update the manifest in one transaction.
+
+    The table is rewritten from df when full_refresh is set or when it has no
+    manifest entries yet (e.g. it was created by an earlier full load). df may
+    also be an iterable of DataFrames, which are written batch by batch as they
+    are produced. With use_lake, the same partitions are replaced in the lake
+    copy of the table (one Parquet file per source workbook and month), before
+    the transaction commits. Returns the number of rows inserted.
+    """
+    loaded_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    batches = [df] if isinstance(df, pd.DataFrame) else df
+    row_counts = pd.Series(dtype=int)
+    inserted = 0
+
+    with engine.begin() as connection:
+        loaded = read_manifest(connection, table_name)
+        table_exists = sa.inspect(connection).has_table(table_name)
+
+        replace = full_refresh or not loaded or not table_exists
+        if replace:
+            stale = list(loaded)
+        else:
+            stale = [name for name in changed + removed if name in loaded]
+            if stale:
+                target = sa.table(table_name, sa.column('Source_File'))
+                connection.execute(sa.delete(target).where(target.c.Source_File.in_(stale)))
+        if use_lake:
+            # Readers fall back to SQL until the lake copy is complete again
+            data_lake.invalidate(table_name)
+            if replace:
+                data_lake.drop_table(table_name)
+            else:
+                data_lake.remove_parts(table_name, changed + removed)
+
+        lake_batches = {}
+        for batch in batches:
+            if 'Source_File' in batch.columns:
+                row_counts = row_counts.add(batch['Source_File'].value_counts(), fill_value=0)
+                if use_lake:
+                    for source_file, rows in batch.groupby('Source_File', observed=True, sort=False):
+                        part = data_lake.source_part(source_file, lake_batches.get(source_file, 0))
+                        data_lake.write_partitions(rows, table_name, part)
+                        lake_batches[source_file] = lake_batches.get(source_file, 0) + 1
+            if replace:
+                # The first batch recreates the table, the rest are appended to it
+                insert_frame(batch, table_name, connection, if_exists='replace', dtype=dtype)
+                replace = False
+            elif not batch.empty:
+                insert_frame(batch, table_name, connection, dtype=dtype)
+            inserted += len(batch)
+        if replace and table_exists:
+            # A full refresh that produced no batches at all leaves the table empty
+            connection.execute(sa.delete(sa.table(table_name)))
+
+        # Refresh the manifest entries for everything that was touched
+        if stale:
+            connection.execute(
+                sa.delete(manifest_table)
+                .where(manifest_table.c.Table_Name == table_name)
+                .where(manifest_table.c.Source_File.in_(stale))
+            )
+        manifest_rows = pd.DataFrame({
+            'Table_Name': table_name,
+            'Source_File': changed,
+            'Content_Hash': [hashes[name] for name in changed],
+            'Dependency_Hash': dependency,
+            'Row_Count': [int(row_counts.get(name, 0)) for name in changed],
+            'Loaded_At': loaded_at,
+        })
+        if not manifest_rows.empty:
+            insert_frame(manifest_rows, manifest_table_name, connection)
+        if use_lake:
+            data_lake.write_state(table_name, {'sources': read_manifest(connection, table_name)})
+
+    print(f"{table_name}: loaded {len(changed)} changed source file(s), removed {len(removed)}.")
+    return inserted
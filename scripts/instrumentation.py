@@ -0,0 +1,252 @@
+import os
+import io
+import json
+import time
+import uuid
+import pstats
+import cProfile
+import functools
+import threading
+import contextvars
+import tracemalloc
+from pathlib import Path
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# JSON-lines file every span is appended to; None disables the spans (they cost one function call)
+run_log_path = os.environ.get('FINANCE_ETL_RUN_LOG')
+
+# Name of the one stage run under cProfile and tracemalloc, e.g. 'Transactions_AX'
+profile_stage = os.environ.get('FINANCE_ETL_PROFILE')
+profile_directory = Path.home() / '.finance_etl' / 'profiles'
+
+# Functions and allocation sites listed in the profile summary
+profile_top_count = 15
+
+# Seconds between two memory samples while a span is open; a peak shorter than this is only
+# caught when it is a new high of the process (VmHWM), not when it is in a worker process
+memory_sample_seconds = 0.05
+
+# Shared by every stage run in this process, so one pipeline run can be grouped in the log
+run_id = uuid.uuid4().hex[:12]
+
+log_lock = threading.Lock()
+current_stage = contextvars.ContextVar('current_stage', default=None)
+
+def configure(run_log=None, profile=None):
+    """Enable the run log and/or profiling from code (the pipeline's --run-log / --profile)."""
+    global run_log_path, profile_stage
+    if run_log is not None:
+        run_log_path = str(run_log)
+    if profile is not None:
+        profile_stage = profile
+
+# ==========================================
+# 2. Helper Functions
+# ==========================================
+def memory_mb(pid='self'):
+    """(current, lifetime peak) resident memory of a process in MB; None where the platform does not report it."""
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            values = {line.split(':')[0]: int(line.split()[1]) / 1024
+                      for line in status if line.startswith(('VmRSS:', 'VmHWM:'))}
+        return values.get('VmRSS'), values.get('VmHWM')
+    except OSError:
+        pass
+    if resource is not None and pid == 'self':
+        return None, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None, None
+
+def children_memory_mb():
+    """Resident memory of this process's child processes (e.g. the parsing pool's workers) in MB, summed."""
+    total = 0
+    try:
+        for task in os.listdir('/proc/self/task'):
+            with open(f'/proc/self/task/{task}/children') as children:
+                for pid in children.read().split():
+                    # A worker that exited since the listing reports None
+                    total += memory_mb(pid)[0] or 0
+    except OSError:
+        return None
+    return total
+
+def highest(*values):
+    """Largest of the values that are not None (None if all are)."""
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+def file_bytes(paths):
+    """Total size of the files that exist, for a span's bytes_read."""
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+def write_record(record):
+    """Append one record to the run log."""
+    if run_log_path is None:
+        return
+    record = {'run_id': run_id, 'stage': current_stage.get(), 'pid': os.getpid(), **record}
+    line = json.dumps(record, default=str)
+    with log_lock:
+        Path(run_log_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(run_log_path, 'a') as f:
+            f.write(line + '\n')
+
+# ==========================================
+# 3. Spans
+# ==========================================
+class MemorySampler:
+    """Background thread sampling the memory of this process and its workers for every open span."""
+
+    def __init__(self):
+        self.spans = set()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def add(self, span):
+        with self.lock:
+            self.spans.add(span)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='memory-sampler', daemon=True)
+                self.thread.start()
+
+    def remove(self, span):
+        with self.lock:
+            self.spans.discard(span)
+
+    def run(self):
+        while True:
+            with self.lock:
+                if not self.spans:
+                    self.thread = None
+                    return
+                spans = list(self.spans)
+            rss, workers = memory_mb()[0], children_memory_mb()
+            for span in spans:
+                span.sample(rss, workers)
+            time.sleep(memory_sample_seconds)
+
+memory_sampler = MemorySampler()
+
+class Span:
+    """Times one step of a stage; set rows_in, rows_out and bytes_read inside the with block.
+
+    peak_rss_mb is the highest resident memory of the process while the span
+    was open, peak_worker_rss_mb that of its worker processes together. Stages
+    running in threads share the process, so each sees the others' memory too.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.rows_in = None
+        self.rows_out = None
+        self.bytes_read = None
+        self.peak_rss = None
+        self.peak_worker_rss = None
+
+    def sample(self, rss, worker_rss):
+        self.peak_rss = highest(self.peak_rss, rss)
+        self.peak_worker_rss = highest(self.peak_worker_rss, worker_rss)
+
+    def __enter__(self):
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        rss, self.start_hwm = memory_mb()
+        self.sample(rss, children_memory_mb())
+        memory_sampler.add(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        seconds = time.perf_counter() - self.start
+        memory_sampler.remove(self)
+        rss, hwm = memory_mb()
+        self.sample(rss, children_memory_mb())
+        if hwm is not None and self.start_hwm is not None and hwm > self.start_hwm:
+            # The process reached a new high while the span was open, so that high is the span's exact peak
+            self.sample(hwm, None)
+        record = {
+            'span': self.name, 'started_at': self.started_at.isoformat(timespec='milliseconds'),
+            'seconds': round(seconds, 4), 'rows_in': self.rows_in, 'rows_out': self.rows_out,
+            'bytes_read': self.bytes_read, 'rss_mb': rss and round(rss, 1),
+            'peak_rss_mb': self.peak_rss and round(self.peak_rss, 1),
+            'peak_worker_rss_mb': self.peak_worker_rss and round(self.peak_worker_rss, 1),
+        }
+        if exc_type is not None:
+            record['error'] = f"{exc_type.__name__}: {exc}"
+        write_record(record)
+        return False
+
+class NullSpan:
+    """Returned by span() while the run log is disabled: ignores everything."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+null_span = NullSpan()
+
+def span(name):
+    """Context manager timing one step (discovery, read, filter, merge, transform, export) of the current stage."""
+    if run_log_path is None:
+        return null_span
+    return Span(name)
+
+# ==========================================
+# 4. Stages & Profiling
+# ==========================================
+def instrumented(stage_name):
+    """Decorate a script's main(): its spans are tagged with stage_name and the whole run is one 'stage' span."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            token = current_stage.set(stage_name)
+            try:
+                with span('stage'):
+                    if profile_stage == stage_name:
+                        return profile(stage_name, function, *args, **kwargs)
+                    return function(*args, **kwargs)
+            finally:
+                current_stage.reset(token)
+        return wrapper
+    return decorator
+
+def profile(stage_name, function, *args, **kwargs):
+    """Run function under cProfile and tracemalloc, save the profile and report the hot spots."""
+    profiler = cProfile.Profile()
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        allocations = tracemalloc.take_snapshot().statistics('lineno')[:profile_top_count]
+        if not already_tracing:
+            tracemalloc.stop()
+
+        profile_directory.mkdir(parents=True, exist_ok=True)
+        profile_path = profile_directory / f"{stage_name}-{run_id}.prof"
+        profiler.dump_stats(profile_path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(profile_top_count)
+
+        print(f"Profile of {stage_name} saved to {profile_path} (open with python -m pstats)")
+        print(summary.getvalue())
+        print(f"Peak traced Python memory: {peak / 1024 ** 2:.1f}MB; largest allocation sites:")
+        for statistic in allocations:
+            print(f"  {statistic.size / 1024 ** 2:8.1f}MB  {statistic.traceback}")
+        write_record({
+            'span': 'profile', 'profile_path': str(profile_path), 'tracemalloc_peak_mb': round(peak / 1024 ** 2, 1),
+            'top_allocations': [{'site': str(s.traceback), 'mb': round(s.size / 1024 ** 2, 2)} for s in allocations],
+        })
@@ -0,0 +1,163 @@
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# Number of unmatched keys listed in the report of each lookup
+report_key_limit = 10
+
+# ==========================================
+# 2. Rule Loading
+# ==========================================
+def read_rules(source, sheet_name=0):
+    """Read a table of mapping rules from a DataFrame, a dict of key -> values, or a .csv/.xlsx/.json file."""
+    if isinstance(source, pd.DataFrame):
+        return source.copy()
+    if isinstance(source, dict):
+        # {'ADP': {'Cost Center': 170, 'Department': 'Finance'}, ...} -> one row per key, key in the index
+        return pd.DataFrame.from_dict(source, orient='index')
+    path = Path(source)
+    suffix = path.suffix.lower()
+    if suffix == '.csv':
+        return pd.read_csv(path)
+    if suffix in ('.xlsx', '.xlsm', '.xls'):
+        return pd.read_excel(path, sheet_name=sheet_name)
+    if suffix == '.json':
+        with open(path) as f:
+            return read_rules(json.load(f))
+    raise ValueError(f"Unsupported mapping rules file: {path}")
+
+# ==========================================
+# 3. Lookups
+# ==========================================
+class Lookup:
+    """One mapping table indexed by its key column; the hash index is built once and reused for every frame."""
+
+    def __init__(self, name, rules, key, columns=None, fill_missing=None, table_key=None):
+        # key: column of the transactions frame; table_key: column of the rules table (defaults to key,
+        # or the index for rules given as a dict). fill_missing: only rows where that column is still
+        # null are updated (an override/fallback), otherwise the columns are joined like a left merge.
+        rules = read_rules(rules)
+        if table_key is None and key not in rules.columns:
+            rules = rules.rename_axis(key).reset_index()
+        table_key = table_key or key
+        if columns is None:
+            columns = [column for column in rules.columns if column != table_key]
+
+        duplicated = rules[table_key].duplicated()
+        if duplicated.any():
+            # First occurrence wins, so a duplicated key can never multiply transaction rows
+            print(f"{name}: ignoring {duplicated.sum()} duplicate rule(s) for key(s) "
+                  f"{format_keys(rules.loc[duplicated, table_key].unique())}")
+            rules = rules[~duplicated]
+
+        self.name = name
+        self.key = key
+        self.columns = list(columns)
+        self.fill_missing = fill_missing
+        self.index = pd.Index(rules[table_key])
+        self.values = rules[self.columns].reset_index(drop=True)
+        self.unmatched = pd.Series(dtype=object)
+
+    def __len__(self):
+        return len(self.index)
+
+    def locate(self, keys):
+        """Row positions of keys in the rules table (-1 where the key has no rule), one hash probe per row."""
+        return self.index.get_indexer(keys)
+
+    def take(self, positions, index):
+        """Rule values for each row; rows without a rule get nulls, as a left merge would give them."""
+        matched = positions >= 0
+        values = self.values.iloc[np.where(matched, positions, 0)].set_index(index)
+        if not matched.all():
+            values = values.where(pd.Series(matched, index=index), axis=0)
+        return values
+
+    def apply(self, df):
+        """Join or fill this lookup's columns into df in one vectorized pass."""
+        positions = self.locate(df[self.key])
+        values = self.take(positions, df.index)
+
+        if self.fill_missing is None:
+            for column in self.columns:
+                df[column] = values[column]
+            unmatched_rows = positions < 0
+        else:
+            # Override only rows the earlier lookups left without a value
+            missing = df[self.fill_missing].isna().to_numpy()
+            update = missing & (positions >= 0)
+            for column in self.columns:
+                if column in df.columns:
+                    df[column] = df[column].mask(update, values[column])
+                else:
+                    df[column] = values[column].where(update)
+            unmatched_rows = missing & (positions < 0)
+
+        keys = df.loc[unmatched_rows, self.key]
+        self.unmatched = keys[keys.notna()].value_counts()
+        return df
+
+    def report(self, row_count):
+        """Print how many rows found no rule, with the most frequent unmatched keys."""
+        rows = int(self.unmatched.sum())
+        if rows:
+            scope = f" still missing {self.fill_missing}" if self.fill_missing else ""
+            print(f"{self.name}: {rows} of {row_count} rows{scope} have no rule "
+                  f"({len(self.unmatched)} keys: {format_keys(self.unmatched.index)})")
+        else:
+            print(f"{self.name}: every key matched")
+
+def format_keys(keys):
+    keys = [str(key) for key in keys]
+    shown = ', '.join(keys[:report_key_limit])
+    return shown + (', ...' if len(keys) > report_key_limit else '')
+
+# ==========================================
+# 4. Mapping Engine
+# ==========================================
+class MappingEngine:
+    """Applies an ordered list of lookups (joins first, then fallbacks); cost grows with rows, not rules."""
+
+    def __init__(self, lookups):
+        self.lookups = list(lookups)
+
+    def apply(self, df, report=True):
+        df = df.copy()
+        for lookup in self.lookups:
+            df = lookup.apply(df)
+        if report:
+            self.report(len(df))
+        return df
+
+    def apply_batches(self, batches, report=True):
+        """Apply the lookups to a stream of frames, yielding each mapped frame.
+
+        The rule indexes are built once and shared by every batch; unmatched keys
+        are summed over the whole stream and reported when it ends.
+        """
+        unmatched = {lookup.name: [] for lookup in self.lookups}
+        row_count = 0
+        for df in batches:
+            df = self.apply(df, report=False)
+            row_count += len(df)
+            for lookup in self.lookups:
+                unmatched[lookup.name].append(lookup.unmatched)
+            yield df
+        for lookup in self.lookups:
+            counts = [keys for keys in unmatched[lookup.name] if not keys.empty]
+            lookup.unmatched = (pd.concat(counts).groupby(level=0).sum().sort_values(ascending=False)
+                                if counts else pd.Series(dtype=object))
+        if report:
+            self.report(row_count)
+
+    def report(self, row_count):
+        for lookup in self.lookups:
+            lookup.report(row_count)
+
+    def unmatched_keys(self):
+        """Unmatched keys (with row counts) of the last apply, by lookup name."""
+        return {lookup.name: lookup.unmatched for lookup in self.lookups}
@@ -0,0 +1,236 @@
+import argparse
+import importlib
+import json
+import os
+import time
+import traceback
+import sqlalchemy as sa
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import database
+from database import get_engine, reset_metrics, report_metrics
+from incremental_load import dependency_hash
+from instrumentation import configure, write_record
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# Fingerprint of each stage's inputs at its last successful run
+default_state_path = Path.home() / '.finance_etl' / 'pipeline_state.json'
+
+# Stages run at the same time; the AX and Sage stages also parse their workbooks in their own process pools
+default_max_workers = 3
+
+# ==========================================
+# 2. Stages
+# ==========================================
+class Stage:
+    """One pipeline script: its main() is the work, input_files() (optional) what it reads."""
+
+    def __init__(self, name, outputs, depends_on=()):
+        # name is the script's module name; outputs are the tables it writes
+        self.name = name
+        self.outputs = list(outputs)
+        self.depends_on = list(depends_on)
+
+    def module(self):
+        return importlib.import_module(self.name)
+
+    def fingerprint(self, upstream_fingerprints):
+        """Hash of the stage's script, its input files and its upstream stages' fingerprints."""
+        module = self.module()
+        files = [Path(module.__file__)]
+        if hasattr(module, 'input_files'):
+            files += [Path(path) for path in module.input_files()]
+        # Missing inputs are folded in by name, so one appearing later changes the fingerprint
+        present = [path for path in files if path.exists()]
+        missing = sorted(str(path) for path in files if not path.exists())
+        return dependency_hash(present, '|'.join(upstream_fingerprints + missing))
+
+    def outputs_exist(self):
+        module = self.module()
+        with get_engine(module.connection_string).connect() as connection:
+            inspector = sa.inspect(connection)
+            return all(inspector.has_table(table) for table in self.outputs)
+
+stages = [
+    Stage('Transactions_AX', ['Transactions_AX']),
+    Stage('Transactions_Sage', ['Transactions_Sage']),
+    Stage('Forecasts', ['Forecast', 'Forecast_Lines']),
+    Stage('Transactions_Final', ['Transactions_Final', 'Transactions_Final_Monthly_Hierarchy', 'Transactions_Final_Monthly_Supplier',
+                                 'Transactions_Final_Monthly_Cost_Center'], depends_on=['Transactions_AX', 'Transactions_Sage']),
+    Stage('Actual_vs_Forecast', ['Actual_vs_Forecast'], depends_on=['Transactions_Final', 'Forecasts']),
+]
+
+def topological_order(stages):
+    """Stages ordered so each comes after its dependencies; rejects unknown stages and cycles."""
+    by_name = {stage.name: stage for stage in stages}
+    ordered, visiting, done = [], set(), set()
+
+    def visit(stage):
+        if stage.name in done:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Dependency cycle through stage {stage.name}")
+        visiting.add(stage.name)
+        for name in stage.depends_on:
+            if name not in by_name:
+                raise ValueError(f"Stage {stage.name} depends on unknown stage {name}")
+            visit(by_name[name])
+        visiting.discard(stage.name)
+        done.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+# ==========================================
+# 3. State
+# ==========================================
+def load_state(state_path):
+    try:
+        with open(state_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state, state_path):
+    state_path = Path(state_path)
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = state_path.with_suffix('.tmp')
+    with open(temp_path, 'w') as f:
+        json.dump(state, f, indent=1)
+    os.replace(temp_path, state_path)
+
+# ==========================================
+# 4. Runner
+# ==========================================
+def run_stage(module):
+    """Run a stage's main(); returns (start, end, error) with perf_counter times."""
+    start = time.perf_counter()
+    try:
+        module.main()
+        error = None
+    except Exception as e:
+        traceback.print_exc()
+        error = e
+    return start, time.perf_counter(), error
+
+def run_pipeline(stages=stages, max_workers=default_max_workers, force=False, state_path=default_state_path,
+                 connection_string=None):
+    """Run every stage once its dependencies have finished, up to max_workers at a time.
+
+    Stages run in threads of this process, so every stage writing to the same
+    connection string shares one pooled engine (database.get_engine). A stage
+    is skipped when its fingerprint matches its last successful run and its
+    output tables exist. Returns {stage name: result}.
+    """
+    ordered = topological_order(stages)
+    state = {} if force else load_state(state_path)
+    results = {}
+    pending = list(ordered)
+    running = {}
+    reset_metrics()
+    pipeline_start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            # Start (or skip) every stage whose dependencies are all resolved
+            for stage in list(pending):
+                upstream = [results.get(name) for name in stage.depends_on]
+                if any(result is None for result in upstream):
+                    continue
+                pending.remove(stage)
+                now = time.perf_counter()
+                if any(result['status'] in ('failed', 'blocked') for result in upstream):
+                    results[stage.name] = {'status': 'blocked', 'start': now, 'end': now, 'fingerprint': None}
+                    write_record({'stage': stage.name, 'span': 'pipeline', 'status': 'blocked'})
+                    continue
+
+                module = stage.module()
+                if connection_string:
+                    module.connection_string = connection_string
+                fingerprint = stage.fingerprint([result['fingerprint'] for result in upstream])
+                if state.get(stage.name) == fingerprint and stage.outputs_exist():
+                    print(f"[pipeline] {stage.name}: inputs unchanged, skipped")
+                    results[stage.name] = {'status': 'skipped', 'start': now, 'end': now, 'fingerprint': fingerprint}
+                    write_record({'stage': stage.name, 'span': 'pipeline', 'status': 'skipped'})
+                    continue
+
+                print(f"[pipeline] {stage.name}: started")
+                running[executor.submit(run_stage, module)] = (stage, fingerprint)
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, fingerprint = running.pop(future)
+                start, end, error = future.result()
+                status = 'failed' if error else 'ran'
+                results[stage.name] = {'status': status, 'start': start, 'end': end, 'fingerprint': fingerprint}
+                print(f"[pipeline] {stage.name}: {status} in {end - start:.1f}s")
+                write_record({'stage': stage.name, 'span': 'pipeline', 'status': status,
+                              'seconds': round(end - start, 4), 'start_offset_seconds': round(start - pipeline_start, 4)})
+                if not error:
+                    state[stage.name] = fingerprint
+                    save_state(state, state_path)
+
+    print_summary(ordered, results, time.perf_counter() - pipeline_start, pipeline_start)
+    report_metrics()
+    return results
+
+# ==========================================
+# 5. Timing Summary
+# ==========================================
+def critical_path(ordered, results):
+    """The chain of dependent stages with the largest total run time, and that time."""
+    finish, previous = {}, {}
+    for stage in ordered:
+        result = results[stage.name]
+        duration = result['end'] - result['start']
+        upstream = max(stage.depends_on, key=lambda name: finish[name], default=None)
+        finish[stage.name] = duration + (finish[upstream] if upstream else 0)
+        previous[stage.name] = upstream
+
+    name = max(finish, key=finish.get)
+    total = finish[name]
+    path = []
+    while name:
+        path.append(name)
+        name = previous[name]
+    return path[::-1], total
+
+def print_summary(ordered, results, wall_seconds, pipeline_start):
+    print(f"\n{'stage':<22}{'status':<10}{'start':>9}{'seconds':>10}")
+    for stage in ordered:
+        result = results[stage.name]
+        print(f"{stage.name:<22}{result['status']:<10}{result['start'] - pipeline_start:>8.1f}s"
+              f"{result['end'] - result['start']:>9.1f}s")
+    if ordered:
+        path, total = critical_path(ordered, results)
+        print(f"Critical path: {' -> '.join(path)} ({total:.1f}s of {wall_seconds:.1f}s wall time)")
+
+# ==========================================
+# 6. Command Line
+# ==========================================
+def main():
+    parser = argparse.ArgumentParser(description="Run the ETL stages in dependency order.")
+    parser.add_argument('--max-workers', type=int, default=default_max_workers, help="stages run at the same time")
+    parser.add_argument('--force', action='store_true', help="run every stage even if its inputs are unchanged")
+    parser.add_argument('--connection-string', help="use this database for every stage (one shared engine)")
+    parser.add_argument('--state-path', type=Path, default=default_state_path)
+    parser.add_argument('--pool-size', type=int, default=database.pool_size, help="connections kept open per database")
+    parser.add_argument('--run-log', type=Path, help="append timing spans of every stage to this JSON-lines file")
+    parser.add_argument('--profile', metavar='STAGE', help="run this stage under cProfile and tracemalloc")
+    args = parser.parse_args()
+    configure(args.run_log, args.profile)
+    database.pool_size = args.pool_size
+
+    results = run_pipeline(stages, args.max_workers, args.force, args.state_path, args.connection_string)
+    if any(result['status'] in ('failed', 'blocked') for result in results.values()):
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
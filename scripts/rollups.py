@@ -0,0 +1,97 @@
+import pandas as pd
+import sqlalchemy as sa
+from bulk_writer import insert_frame, create_index
+from change_log import month_filter
+from schema import apply_schema, sql_column_types
+import data_lake
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# Largest difference between a month's rollup total and its detail total accepted as rounding
+reconciliation_tolerance = 0.01
+
+# ==========================================
+# 2. Helper Functions
+# ==========================================
+def read_monthly_totals(connection, table_name, keys, schema, periods=None, use_lake=False):
+    """Amount and row count per month and keys: summed per day on the server, per month here.
+
+    periods limits the read to those months (None = every month). With use_lake
+    the rows are read from the lake copy of the table instead, pruned to those
+    months' partitions, and summed here.
+    """
+    if use_lake:
+        df = data_lake.read_table(table_name, ['Date', 'Amount'] + keys, periods)
+        df['Row_Count'] = 1
+    else:
+        source = sa.table(table_name, sa.column('Date'), sa.column('Amount'), *[sa.column(key) for key in keys])
+        group = [source.c.Date] + [source.c[key] for key in keys]
+        query = sa.select(*group, sa.func.sum(source.c.Amount).label('Amount'), sa.func.count().label('Row_Count'))
+        query = query.group_by(*group)
+        if periods is not None:
+            query = query.where(month_filter(source.c.Date, periods))
+        df = pd.read_sql(query, connection)
+
+    df = apply_schema(df, {key: schema[key] for key in keys if key in schema})
+    df.insert(0, 'Period', pd.to_datetime(df.pop('Date'), format='ISO8601').dt.to_period('M').dt.start_time)
+    totals = df.groupby(['Period'] + keys, dropna=False, observed=True)[['Amount', 'Row_Count']].sum().reset_index()
+    return apply_schema(totals, {'Period': 'date', 'Amount': 'amount', 'Row_Count': 'integer'})
+
+def rollup_types(keys, schema):
+    """SQL column types of a rollup table."""
+    types = {'Period': sql_column_types['date'], 'Amount': sql_column_types['amount'], 'Row_Count': sql_column_types['integer']}
+    types.update({key: sql_column_types[schema[key]] if key in schema else sa.Text() for key in keys})
+    return types
+
+# ==========================================
+# 3. Rollups
+# ==========================================
+def refresh_rollup(connection, rollup_name, table_name, keys, schema, periods=None, use_lake=False):
+    """Bring a monthly rollup of table_name up to date on an open transaction.
+
+    Only the given months are deleted and regrouped; the whole rollup is
+    rebuilt when periods is None or the rollup does not exist yet. With
+    use_lake the detail rows are read from the table's lake copy.
+    Returns the number of rollup rows written.
+    """
+    if periods is not None and not periods and sa.inspect(connection).has_table(rollup_name):
+        return 0
+    if periods is None or not sa.inspect(connection).has_table(rollup_name):
+        totals = read_monthly_totals(connection, table_name, keys, schema, use_lake=use_lake)
+        insert_frame(totals, rollup_name, connection, if_exists='replace', dtype=rollup_types(keys, schema))
+        create_index(connection, rollup_name, ['Period'])
+        return len(totals)
+
+    rollup = sa.table(rollup_name, sa.column('Period'))
+    connection.execute(sa.delete(rollup).where(month_filter(rollup.c.Period, periods)))
+    totals = read_monthly_totals(connection, table_name, keys, schema, periods, use_lake)
+    insert_frame(totals, rollup_name, connection, dtype=rollup_types(keys, schema))
+    return len(totals)
+
+def reconcile_rollups(connection, table_name, rollup_names, periods=None):
+    """Compare each rollup's monthly amount and row count with the detail table's.
+
+    periods limits the comparison to those months (None = every month), so a
+    build only pays for reading back the months it regrouped.
+    Returns {rollup name: months that do not reconcile}; empty when everything matches.
+    """
+    if periods is not None and not periods:
+        return {}
+    detail = read_monthly_totals(connection, table_name, [], {}, periods)
+    mismatches = {}
+    for rollup_name in rollup_names:
+        rollup = sa.table(rollup_name, sa.column('Period'), sa.column('Amount'), sa.column('Row_Count'))
+        query = sa.select(rollup.c.Period, sa.func.sum(rollup.c.Amount).label('Amount'),
+                          sa.func.sum(rollup.c.Row_Count).label('Row_Count')).group_by(rollup.c.Period)
+        if periods is not None:
+            query = query.where(month_filter(rollup.c.Period, periods))
+        totals = apply_schema(pd.read_sql(query, connection), {'Period': 'date'})
+        compared = detail.merge(totals, on='Period', how='outer', suffixes=('', ' (rollup)'))
+        differs = (
+            (compared['Amount'].fillna(0) - compared['Amount (rollup)'].fillna(0)).abs().gt(reconciliation_tolerance)
+            | compared['Row_Count'].fillna(0).ne(compared['Row_Count (rollup)'].fillna(0))
+        )
+        if differs.any():
+            mismatches[rollup_name] = sorted(compared.loc[differs, 'Period'].dt.date)
+    return mismatches
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+
+# ==========================================
+# 1. Column Kinds
+# ==========================================
+# Bump when a table schema changes so incremental loads rebuild the tables once
+schema_version = 2
+
+# SQL column type used for each kind of column
+sql_column_types = {
+    'date': sa.Date(),
+    'category': sa.String(255),
+    'text': sa.String(255),
+    'cost_center': sa.Integer(),
+    'integer': sa.Integer(),
+    'amount': sa.Numeric(19, 4, asdecimal=False),
+}
+
+# Decimal places kept for amounts (matches the Numeric(19, 4) SQL type)
+amount_precision = 4
+
+# ==========================================
+# 2. Table Schemas
+# ==========================================
+hierarchy_columns = {
+    'Company': 'category', 'Level 1': 'category', 'Level 2': 'category',
+    'Level 3': 'category', 'Level 4': 'category', 'Department': 'category',
+}
+
+transactions_ax_schema = {
+    **hierarchy_columns,
+    'Date': 'date',
+    'Journal number': 'text',
+    'Voucher': 'text',
+    'Ledger account': 'text',
+    'Supplier Account AX': 'text',
+    'Year closed': 'category',
+    'Account name': 'category',
+    'Currency': 'category',
+    'Posting type': 'category',
+    'Posting layer': 'category',
+    'FS type': 'category',
+    'Cost Center': 'cost_center',
+    'Amount in transaction currency': 'amount',
+    'Amount': 'amount',
+    'Amount in reporting currency': 'amount',
+}
+
+transactions_sage_schema = {
+    **hierarchy_columns,
+    'Date': 'date',
+    'N/C:': 'integer',
+    'No': 'integer',
+    'Account ': 'text',
+    'Ref': 'text',
+    'Company/Account': 'text',
+    'Type': 'category',
+    'T/C': 'category',
+    'Name': 'category',
+    'Cost Center': 'cost_center',
+    'Total': 'amount',
+}
+
+transactions_final_schema = {
+    **hierarchy_columns,
+    'Date': 'date',
+    'Account Name': 'category',
+    'Posting type': 'category',
+    'Cost Center': 'cost_center',
+    'Amount': 'amount',
+}
+
+# Long-format forecasts (one row per department, line and month)
+forecast_schema = {
+    'Department': 'category',
+    'Line': 'integer',
+    'Period': 'date',
+    'Amount': 'amount',
+}
+
+# Actual vs forecast by month and reporting keys (Actual_vs_Forecast)
+variance_schema = {
+    'Period': 'date',
+    'Level 1': 'category', 'Level 2': 'category', 'Level 3': 'category', 'Level 4': 'category',
+    'Department': 'category',
+    'Cost Center': 'cost_center',
+    'Actual': 'amount',
+    'Forecast': 'amount',
+    'Variance': 'amount',
+    'Variance %': 'amount',
+}
+
+# ==========================================
+# 3. Helper Functions
+# ==========================================
+def to_dates(column):
+    """Convert a column to datetime64 dates; text is ISO (as read back from SQL) or dd/mm/yyyy."""
+    if not pd.api.types.is_datetime64_any_dtype(column):
+        try:
+            column = pd.to_datetime(column, format='ISO8601')
+        except (ValueError, TypeError):
+            column = pd.to_datetime(column, dayfirst=True)
+    return column.dt.normalize()
+
+def apply_schema(df, schema):
+    """Convert the schema's columns that are present in df to their compact dtypes (vectorized)."""
+    for name, kind in schema.items():
+        if name not in df.columns:
+            continue
+        column = df[name]
+        if kind == 'date':
+            df[name] = to_dates(column)
+        elif kind == 'category':
+            df[name] = column.astype('category')
+        elif kind == 'text':
+            # Identifier codes (vouchers, accounts): the readers parse them as strings (text_dtypes), so '00123'
+            # keeps its zeros and every streamed batch types them alike; values typed elsewhere become strings too
+            df[name] = column.astype(str).where(column.notna())
+        elif kind == 'cost_center':
+            # Cost centers arrive as ints, floats (170.0) or strings ('170'); keep the whole number
+            df[name] = np.trunc(pd.to_numeric(column, errors='coerce')).astype('Int64')
+        elif kind == 'integer':
+            df[name] = pd.to_numeric(column, errors='coerce').astype('Int64')
+        elif kind == 'amount':
+            df[name] = pd.to_numeric(column, errors='coerce').round(amount_precision)
+    return df
+
+def text_dtypes(schema):
+    """dtype= for the Excel readers: the schema's text columns are read as strings, not inferred (None without a schema)."""
+    if schema is None:
+        return None
+    return {name: str for name, kind in schema.items() if kind == 'text'}
+
+def sql_types(df, schema):
+    """SQL column types for the schema's columns present in df (all of them when df is None), for to_sql(dtype=...)."""
+    return {name: sql_column_types[kind] for name, kind in schema.items() if df is None or name in df.columns}
@@ -0,0 +1,174 @@
+import os
+import sys
+import time
+import zipfile
+import argparse
+from pathlib import Path
+import database
+import workbook_cache
+from file_index import refresh_indexes, is_ignored
+from instrumentation import configure
+from pipeline import stages, run_pipeline, default_state_path, default_max_workers
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# Seconds between two scans of the watched directories
+poll_seconds = 2.0
+
+# A new or modified file is processed once its size and mtime have not changed for this long
+# (and, for a workbook, once it is a complete zip archive), so half-copied exports are never read
+settle_seconds = 5.0
+
+# Patterns the stages discover their exports with while watching, so a new month is picked up
+# without editing transactions_files / transactions_file_names (stages with a pattern keep theirs)
+discovery_patterns = {
+    'Transactions_AX': r'(\d+\.)?[A-Za-z]+ \d{4} - AX\.xlsx',
+    'Transactions_Sage': '* Nominal Activity.xlsx',
+}
+
+# Parsed workbooks (mapping tables included) kept in memory between runs
+memory_cache_bytes = 512 * 1024 ** 2
+
+# ==========================================
+# 2. Watched Files
+# ==========================================
+def watch_directories(stages):
+    """Directories the stages read from: each module's watch_directories(), else its input files' folders."""
+    directories = set()
+    for stage in stages:
+        module = stage.module()
+        if hasattr(module, 'watch_directories'):
+            directories.update(Path(directory) for directory in module.watch_directories())
+        elif hasattr(module, 'input_files'):
+            directories.update(Path(path).parent for path in module.input_files())
+    return sorted(directories)
+
+def snapshot(directories):
+    """(size, mtime) of every file below the directories."""
+    signatures = {}
+    for directory in directories:
+        for folder, _, names in os.walk(directory):
+            for name in names:
+                # Lock and temporary files: the same rule the stages' file lookups apply
+                if is_ignored(name):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                signatures[path] = (stat.st_size, stat.st_mtime_ns)
+    return signatures
+
+def is_complete(path):
+    """A workbook still being copied has no zip central directory yet; other files only need to settle."""
+    if Path(path).suffix.lower() in ('.xlsx', '.xlsm'):
+        return zipfile.is_zipfile(path)
+    return True
+
+class FolderWatcher:
+    """Reports files that were added, modified or removed, once they have settled."""
+
+    def __init__(self, directories, settle_seconds):
+        self.directories = list(directories)
+        self.settle_seconds = settle_seconds
+        self.known = snapshot(self.directories)
+        # path -> (signature, time it was first seen with that signature)
+        self.settling = {}
+
+    def poll(self, now=None):
+        """Scan once; returns (settled changes, whether any file is still settling)."""
+        now = time.monotonic() if now is None else now
+        current = snapshot(self.directories)
+        for path, signature in current.items():
+            if signature != self.known.get(path) and self.settling.get(path, (None,))[0] != signature:
+                self.settling[path] = (signature, now)
+
+        settled = [path for path in self.known if path not in current]
+        for path in settled:
+            del self.known[path]
+            self.settling.pop(path, None)
+        for path, (signature, since) in list(self.settling.items()):
+            if path not in current:
+                del self.settling[path]
+            elif now - since >= self.settle_seconds and is_complete(path):
+                self.known[path] = signature
+                del self.settling[path]
+                settled.append(path)
+        return sorted(settled), bool(self.settling)
+
+# ==========================================
+# 3. Service Loop
+# ==========================================
+def prepare_stages(stages):
+    """Switch the stages to pattern discovery and keep parsed workbooks in memory."""
+    workbook_cache.memory_max_bytes = memory_cache_bytes
+    for stage in stages:
+        module = stage.module()
+        pattern = discovery_patterns.get(stage.name)
+        if pattern and getattr(module, 'transactions_file_pattern', None) is None:
+            module.transactions_file_pattern = pattern
+
+def process_changes(stages, changes, **pipeline_kwargs):
+    """Run the pipeline for a set of settled changes; returns the stage results."""
+    start = time.perf_counter()
+    print(f"[watch] {len(changes)} file(s) changed: {', '.join(Path(path).name for path in changes)}")
+    # The file indexes are built once per process; pick up the files that arrived since
+    refresh_indexes()
+    results = run_pipeline(stages, **pipeline_kwargs)
+    print(f"[watch] processed in {time.perf_counter() - start:.1f}s")
+    return results
+
+def watch(stages=stages, max_workers=default_max_workers, state_path=default_state_path, connection_string=None,
+          max_runs=None):
+    """Bring every stage up to date, then re-run the pipeline whenever watched files settle after a change.
+
+    Stage modules, engines (database.get_engine) and parsed mapping tables
+    stay loaded between runs; the incremental loads reload only the workbooks
+    whose contents changed. Stops after max_runs change-triggered runs (None = never).
+    """
+    pipeline_kwargs = {'max_workers': max_workers, 'state_path': state_path, 'connection_string': connection_string}
+    prepare_stages(stages)
+    run_pipeline(stages, **pipeline_kwargs)
+    watcher = FolderWatcher(watch_directories(stages), settle_seconds)
+    print(f"[watch] watching {', '.join(map(str, watcher.directories))}")
+
+    runs, ready = 0, set()
+    while max_runs is None or runs < max_runs:
+        time.sleep(poll_seconds)
+        settled, busy = watcher.poll()
+        ready.update(settled)
+        # Wait until nothing is mid-copy: a stage reads every file of its directory, not just the settled ones
+        if ready and not busy:
+            process_changes(stages, sorted(ready), **pipeline_kwargs)
+            ready.clear()
+            runs += 1
+            # Stages may have been pointed at new folders (e.g. a forecast workbook moved)
+            watcher.directories = watch_directories(stages)
+
+# ==========================================
+# 4. Command Line
+# ==========================================
+def main(argv=None):
+    global poll_seconds, settle_seconds
+    parser = argparse.ArgumentParser(description="Watch the export folders and run the pipeline as new workbooks land.")
+    parser.add_argument('--max-workers', type=int, default=default_max_workers, help="stages run at the same time")
+    parser.add_argument('--connection-string', help="use this database for every stage (one shared engine)")
+    parser.add_argument('--state-path', type=Path, default=default_state_path)
+    parser.add_argument('--pool-size', type=int, default=database.pool_size, help="connections kept open per database")
+    parser.add_argument('--poll-seconds', type=float, default=poll_seconds)
+    parser.add_argument('--settle-seconds', type=float, default=settle_seconds)
+    parser.add_argument('--run-log', type=Path, help="append timing spans of every stage to this JSON-lines file")
+    args = parser.parse_args(argv)
+    configure(args.run_log)
+    database.pool_size = args.pool_size
+    poll_seconds, settle_seconds = args.poll_seconds, args.settle_seconds
+
+    try:
+        watch(stages, args.max_workers, args.state_path, args.connection_string)
+    except KeyboardInterrupt:
+        print("[watch] stopped")
+
+if __name__ == '__main__':
+    sys.exit(main())
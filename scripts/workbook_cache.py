@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import inspect
+import threading
+import pandas as pd
+from collections import OrderedDict
+from pathlib import Path
+
+# ==========================================
+# 1. Configuration
+# ==========================================
+# Local directory holding parsed workbooks as Parquet files
+default_cache_directory = Path.home() / '.finance_etl' / 'workbook_cache'
+
+# Least recently used entries are evicted once the cache grows past this size
+default_max_bytes = 2 * 1024 ** 3
+
+# Bump when reader logic changes so older cached frames are no longer used
+cache_format_version = 5
+
+# Parsed frames also kept in this process's memory, up to this many bytes (0 = off). Long-running
+# processes such as watch_folders.py turn it on so mapping tables are not re-read from disk every run
+memory_max_bytes = 0
+
+# ==========================================
+# 2. Helper Functions
+# ==========================================
+# Hashes already computed in this process, keyed by (path, size, mtime)
+content_hash_memo = {}
+
+# In-memory entries of every cache in this process: key -> (frame, bytes), least recently used first
+memory_entries = OrderedDict()
+memory_lock = threading.Lock()
+
+def file_content_hash(file_path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file's contents."""
+    file_path = Path(file_path).resolve()
+    stat = file_path.stat()
+    memo_key = (str(file_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in content_hash_memo:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(chunk_size), b''):
+                digest.update(chunk)
+        content_hash_memo[memo_key] = digest.hexdigest()
+    return content_hash_memo[memo_key]
+
+def reader_parameters(reader, file_path, reader_kwargs):
+    """Resolve every argument the reader will see (defaults included) apart from the file path."""
+    bound = inspect.signature(reader).bind(file_path, **reader_kwargs)
+    bound.apply_defaults()
+    params = dict(bound.arguments)
+    params.pop(next(iter(params)))
+    return params
+
+# ==========================================
+# 3. Cache
+# ==========================================
+class WorkbookCache:
+    """On-disk cache of parsed, column-pruned workbook frames stored as Parquet."""
+
+    def __init__(self, cache_directory=None, max_bytes=default_max_bytes):
+        self.cache_directory = Path(cache_directory or default_cache_directory)
+        self.cache_directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, reader, file_path, **reader_kwargs):
+        """Build the content-addressed key for reading file_path with reader and its arguments."""
+        file_path = Path(file_path).resolve()
+        stat = file_path.stat()
+        key_fields = {
+            'version': cache_format_version,
+            'path': str(file_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'content': file_content_hash(file_path),
+            'reader': f"{reader.__module__}.{reader.__qualname__}",
+            'params': reader_parameters(reader, file_path, reader_kwargs),
+        }
+        return hashlib.sha256(json.dumps(key_fields, sort_keys=True, default=str).encode()).hexdigest()
+
+    def entry_path(self, key):
+        return self.cache_directory / f"{key}.parquet"
+
+    def remember(self, key, df):
+        """Keep a frame in memory, evicting the least recently used ones past memory_max_bytes."""
+        if not memory_max_bytes:
+            return
+        # A shallow copy: with copy-on-write, later changes by the caller never reach the kept frame
+        size = int(df.memory_usage(deep=True).sum())
+        with memory_lock:
+            memory_entries[key] = (df.copy(deep=False), size)
+            memory_entries.move_to_end(key)
+            while sum(entry_size for _, entry_size in memory_entries.values()) > memory_max_bytes:
+                memory_entries.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached frame for key, or None on a miss."""
+        with memory_lock:
+            entry = memory_entries.get(key)
+            if entry is not None:
+                memory_entries.move_to_end(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[0].copy(deep=False)
+        path = self.entry_path(key)
+        try:
+            df = pd.read_parquet(path)
+        except (FileNotFoundError, OSError, ValueError):
+            self.misses += 1
+            return None
+        # Touch the entry so eviction treats it as recently used
+        os.utime(path)
+        self.hits += 1
+        self.remember(key, df)
+        return df
+
+    def put(self, key, df):
+        """Store a frame under key and evict old entries if the cache is over its size limit."""
+        self.remember(key, df)
+        path = self.entry_path(key)
+        temp_path = path.with_suffix('.tmp')
+        try:
+            df.to_parquet(temp_path)
+            os.replace(temp_path, path)
+        except Exception as e:
+            # Frames with mixed-type object columns cannot always be stored; skip rather than fail the run
+            temp_path.unlink(missing_ok=True)
+            print(f"Workbook cache: could not store entry ({e})")
+            return
+        self.evict()
+
+    def load(self, reader, file_path, **reader_kwargs):
+        """Return reader(file_path, **reader_kwargs), served from the cache when possible."""
+        key = self.key(reader, file_path, **reader_kwargs)
+        df = self.get(key)
+        if df is None:
+            df = reader(file_path, **reader_kwargs)
+            self.put(key, df)
+        return df
+
+    def entries(self):
+        """List cache entries as (path, size, last_used), most recently used first."""
+        entries = []
+        for path in self.cache_directory.glob('*.parquet'):
+            stat = path.stat()
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2], reverse=True)
+
+    def total_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits within max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        while entries and total > self.max_bytes:
+            path, size, _ = entries.pop()
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def purge(self, older_than_days=None):
+        """Delete every entry, or only those not used in the last older_than_days days."""
+        cutoff = None if older_than_days is None else time.time() - older_than_days * 86400
+        removed = 0
+        for path, _, last_used in self.entries():
+            if cutoff is None or last_used < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def report(self):
+        """Print this run's hit/miss counters."""
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0
+        print(f"Workbook cache: {self.hits} hits, {self.misses} misses ({rate:.0%} hit rate)")
+
+# ==========================================
+# 4. Command line
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or purge the parsed-workbook cache.")
+    parser.add_argument('--cache-directory', default=None, help="Cache location (defaults to ~/.finance_etl/workbook_cache)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('info', help="Show entry count and total size")
+    commands.add_parser('list', help="List entries, most recently used first")
+    purge_parser = commands.add_parser('purge', help="Delete cache entries")
+    purge_parser.add_argument('--older-than', type=float, default=None, metavar='DAYS',
+                              help="Only delete entries not used in this many days")
+    args = parser.parse_args(argv)
+
+    cache = WorkbookCache(args.cache_directory)
+    if args.command == 'info':
+        entries = cache.entries()
+        total = sum(size for _, size, _ in entries)
+        print(f"Location: {cache.cache_directory}")
+        print(f"Entries:  {len(entries)}")
+        print(f"Size:     {total / 1024 ** 2:.1f} MB of {cache.max_bytes / 1024 ** 2:.0f} MB")
+    elif args.command == 'list':
+        for path, size, last_used in cache.entries():
+            used = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_used))
+            print(f"{used}  {size / 1024:10.1f} KB  {path.name}")
+    elif args.command == 'purge':
+        removed = cache.purge(args.older_than)
+        print(f"Removed {removed} cache entries.")
+
+if __name__ == '__main__':
+    sys.exit(main())
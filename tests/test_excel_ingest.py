@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+import pandas as pd
+import pandas.testing as tm
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+from excel_ingest import read_excel_sheet, iter_excel_batches, read_ax_transactions, iter_ax_transactions
+from schema import transactions_ax_schema
+
+# Small enough for the sheets below to span several batches
+batch_size = 3
+
+def write_sheet(path, df):
+    df.to_excel(path, sheet_name='Sheet1', index=False)
+    return path
+
+def test_read_excel_sheet_types_columns_across_batches(tmp_path):
+    # Numeric-looking codes in the first batch, a text code in the second
+    df = pd.DataFrame({
+        'Code': ['00123', '00124', '00125', 'AB12', '00126', '00127', '00128'],
+        'Amount': [1, 2, 3, 4, 5, 6, 7.5],
+        'Name': ['a', 'b', 'c', 'd', 'e', 'f', 'g'],
+    })
+    path = write_sheet(tmp_path / 'codes.xlsx', df)
+    columns = list(df.columns)
+
+    batches = list(iter_excel_batches(path, 'Sheet1', 1, columns, batch_size))
+    result = read_excel_sheet(path, 'Sheet1', 1, columns, batch_size)
+
+    assert len(batches) > 1
+    tm.assert_frame_equal(result, pd.read_excel(path, sheet_name='Sheet1'))
+    assert result['Code'].tolist() == df['Code'].tolist()
+
+def test_read_excel_sheet_skips_missing_columns_and_trailing_blanks(tmp_path):
+    df = pd.DataFrame({'Account': ['0042', None, '0043', 'V-17', None, None], 'Total': [1.5, None, 2, 3, None, None]})
+    path = write_sheet(tmp_path / 'blanks.xlsx', df)
+
+    result = read_excel_sheet(path, 'Sheet1', 1, ['Account', 'Total', 'Missing'], batch_size)
+
+    tm.assert_frame_equal(result, pd.read_excel(path, sheet_name='Sheet1'))
+
+def test_streamed_batches_keep_identifier_codes_as_text(tmp_path):
+    # The only text code sits in the second batch; the other batches look numeric
+    df = pd.DataFrame({
+        'Voucher': ['00123', '00124', '00125', 'AB12', '00126', '00999', '00127'],
+        'Supplier Account AX': ['0042', '0043', '0044', '0045', 'S-1', '0046', '0047'],
+        'Amount': [1, 2, 3, 4, 5, 6, 7.5],
+        'Supplier Required': [True] * 7,
+        'Ledger Code': [6] * 7,
+    })
+    path = write_sheet(tmp_path / 'ax.xlsx', df)
+    columns = list(df.columns)
+
+    streamed = pd.concat(iter_ax_transactions(path, columns, transactions_ax_schema, batch_size), ignore_index=True)
+    result = read_ax_transactions(path, columns, transactions_ax_schema)
+
+    tm.assert_frame_equal(streamed, result)
+    assert streamed['Voucher'].tolist() == df['Voucher'].tolist()
+    assert streamed['Supplier Account AX'].tolist() == df['Supplier Account AX'].tolist()
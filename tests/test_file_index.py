@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+from file_index import FileIndex
+from watch_folders import discovery_patterns
+
+def touch(directory, *names):
+    for name in names:
+        (directory / name).write_bytes(b'')
+
+def test_find_skips_lock_and_temporary_files(tmp_path):
+    touch(tmp_path, '1.Strike Jan 2024 Nominal Activity.xlsx', '~$1.Strike Jan 2024 Nominal Activity.xlsx',
+          '.~1.Strike Feb 2024 Nominal Activity.xlsx', 'January 2024 - AX.xlsx', '~$January 2024 - AX.xlsx',
+          'February 2024 - AX.xlsx.tmp')
+
+    index = FileIndex(tmp_path)
+
+    assert index.find(discovery_patterns['Transactions_Sage']) == [tmp_path / '1.Strike Jan 2024 Nominal Activity.xlsx']
+    assert index.find_regex(discovery_patterns['Transactions_AX']) == [tmp_path / 'January 2024 - AX.xlsx']
+    assert index.find('~$January 2024 - AX.xlsx') == []
+
+def test_refresh_picks_up_new_files_but_not_their_lock_files(tmp_path):
+    touch(tmp_path, 'January 2024 - AX.xlsx')
+    index = FileIndex(tmp_path)
+
+    touch(tmp_path, 'February 2024 - AX.xlsx', '~$February 2024 - AX.xlsx')
+    index.refresh()
+    index.build_name_map()
+
+    assert index.find('* - AX.xlsx') == [tmp_path / 'February 2024 - AX.xlsx', tmp_path / 'January 2024 - AX.xlsx']